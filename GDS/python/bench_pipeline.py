@@ -0,0 +1,201 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from csr_graph import CSRGraph, compute_gds_metrics
+from generate_workflows import generate
+from json_stream import max_rss_mb
+from json_to_metta import process_workflow_data
+from metta_script import label_directives, split_metta_script
+import run_gds
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_PATH = os.path.join(BASE_DIR, "../metta/galaxy_schema.metta")
+QUERIES_PATH = os.path.join(BASE_DIR, "../metta/galaxy_queries.metta")
+
+# Slope of log(time) vs log(scale) above which a stage is reported as superlinear
+SUPERLINEAR_SLOPE = 1.15
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def timed(stages, name, fn, *args):
+    """Runs fn(*args) with stdout silenced and records its wall time under `name`."""
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        value = fn(*args)
+    stages[name] = time.perf_counter() - t0
+    return value
+
+
+def time_queries(stages, agent, directives, prefix, result):
+    """
+    Times every query directive (status echoes skipped) as `<prefix>_<n>` and
+    records its result count and label in `result`.
+    """
+    counts = result.setdefault("result_counts", {})
+    labels = result.setdefault("query_labels", {})
+    n = 0
+    for label, directive in label_directives(directives):
+        if directive.startswith('!("'):
+            continue
+        n += 1
+        name = f"{prefix}_{n}"
+        results = timed(stages, name, agent.process_metta_string, directive)
+        counts[name] = len(results or [])
+        labels[name] = label
+
+
+def run_scale(json_path, workdir):
+    """
+    Times every pipeline stage for one dataset. Runs in its own process so each
+    scale starts from an empty MORK space and reports its own peak RSS.
+    """
+    metta_path = os.path.join(workdir, "data.metta")
+    symbols_path = os.path.join(workdir, "data.symbols.json")
+    stages = {}
+    result = {"stages": stages}
+
+    timed(stages, "convert", process_workflow_data, json_path, metta_path, symbols_path)
+    graph = timed(stages, "csr_build", CSRGraph.from_metta_file, metta_path)
+    timed(stages, "csr_metrics", compute_gds_metrics, graph)
+
+    with open(metta_path, "r", encoding="utf-8") as f:
+        result["atoms"] = sum(1 for line in f if line.startswith("("))
+    result["nodes"] = len(graph.nodes)
+    result["edges"] = len(graph.indices) // 2
+
+    if run_gds.petta is not None:
+        agent = run_gds.petta.PeTTa(verbose=False)
+        with open(metta_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        timed(stages, "ingest", run_gds.mork_add_atoms, content)
+        del content
+        timed(stages, "schema", agent.load_metta_file, SCHEMA_PATH)
+
+        definitions, directives = split_metta_script(QUERIES_PATH)
+        agent.process_metta_string(definitions)
+        # Default path first (neighbor lists matched live), then the same queries
+        # over the stored adjacency, which takes over once it is in the space
+        time_queries(stages, agent, directives, "query", result)
+        timed(stages, "precompute", run_gds.precompute_adjacency, metta_path)
+        time_queries(stages, agent, directives, "pre_query", result)
+    else:
+        result["skipped"] = "PeTTa not importable: ingest, schema and queries not timed"
+
+    result["max_rss_mb"] = max_rss_mb()
+    return result
+
+
+def growth_exponents(runs):
+    """
+    Least-squares slope of log(seconds) against log(scale) for every stage.
+    About 1 means linear growth; clearly above 1 means superlinear.
+    """
+    exponents = {}
+    stage_names = {name for run in runs for name in run["stages"]}
+    for name in sorted(stage_names):
+        points = [
+            (math.log(run["scale"]), math.log(run["stages"][name]))
+            for run in runs
+            if run["stages"].get(name, 0) > 0
+        ]
+        if len(points) < 2:
+            continue
+        mx = sum(x for x, _ in points) / len(points)
+        my = sum(y for _, y in points) / len(points)
+        sxx = sum((x - mx) ** 2 for x, _ in points)
+        if sxx == 0:
+            continue
+        exponents[name] = sum((x - mx) * (y - my) for x, y in points) / sxx
+    return exponents
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scales",
+        default="1,10,100",
+        help="Comma separated scale factors relative to iwc_full.json (1 to 1000).",
+    )
+    parser.add_argument(
+        "--output",
+        default="bench_baselines.json",
+        help="Machine readable baseline file.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Generator random seed.")
+    parser.add_argument(
+        "--timeout", type=int, default=3600, help="Seconds allowed per scale."
+    )
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(RESULT_PREFIX + json.dumps(run_scale(*args.child)))
+        return
+
+    scales = [float(s) for s in args.scales.split(",")]
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            print(f"\n[Scale {scale:g}x]")
+            json_path = os.path.join(tmp, f"iwc_{scale:g}x.json")
+
+            t0 = time.perf_counter()
+            n_workflows = generate(scale, json_path, seed=args.seed)
+            size_mb = os.path.getsize(json_path) / (1024 * 1024)
+            print(
+                f"  Generated {n_workflows} workflows ({size_mb:.2f} MB) "
+                f"in {time.perf_counter() - t0:.2f} sec"
+            )
+
+            try:
+                proc = subprocess.run(
+                    [sys.executable, __file__, "--child", json_path, tmp],
+                    capture_output=True,
+                    text=True,
+                    timeout=args.timeout,
+                )
+            except subprocess.TimeoutExpired:
+                print(f"  Timed out after {args.timeout} sec, stopping here.")
+                break
+
+            lines = [l for l in proc.stdout.splitlines() if l.startswith(RESULT_PREFIX)]
+            if proc.returncode != 0 or not lines:
+                print(f"  Failed:\n{proc.stderr[-2000:]}")
+                break
+
+            run = json.loads(lines[-1][len(RESULT_PREFIX) :])
+            run.update(scale=scale, workflows=n_workflows, input_mb=size_mb)
+            runs.append(run)
+
+            print(
+                f"  {run['atoms']} atoms, {run['nodes']} nodes, {run['edges']} edges, "
+                f"peak RSS {run['max_rss_mb']:.1f} MB"
+            )
+            for name, sec in run["stages"].items():
+                print(f"  {name:<16} {sec:>10.4f} sec")
+            if "skipped" in run:
+                print(f"  ({run['skipped']})")
+
+    exponents = growth_exponents(runs)
+    if exponents:
+        print("\n[Growth] slope of log(time) vs log(scale)")
+        for name, slope in exponents.items():
+            flag = "  <-- superlinear" if slope > SUPERLINEAR_SLOPE else ""
+            print(f"  {name:<16} {slope:>6.2f}{flag}")
+
+    with open(args.output, "w") as f:
+        json.dump({"runs": runs, "growth_exponents": exponents}, f, indent=2)
+    print(f"\n[Success] Baselines saved to: {os.path.abspath(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+import heapq
+import itertools
+import math
+import re
+from array import array
+from collections import Counter
+from statistics import NormalDist
+
+# Edge predicates that form the GDS projection (mirrors `gds-edge` in galaxy_queries.metta)
+GDS_EDGES = (
+    "HAS_WORKFLOW",
+    "HAS_TOOL",
+    "HAS_STEP",
+    "WORKFLOW_USES_TOOL",
+    "FEEDS_INTO",
+    "STEP_USES_TOOL",
+    "STEP_GENERATES",
+    "STEP_REQUIRES",
+    "TOOL_HAS_INPUT",
+    "TOOL_HAS_OUTPUT",
+)
+
+# Node types enumerated by `get-all-nodes` (mirrors `valid-type`)
+VALID_TYPES = ("Category", "Workflow", "Tool", "Step", "ToolInput", "ToolOutput")
+
+ATOM_RE = re.compile(r"^\((\S+)\s+(\S+)\s+(\S+)\)\s*$")
+
+
+class CSRGraph:
+    """
+    Undirected, integer-indexed adjacency in compressed sparse row form.
+    Neighbor lists are sorted and deduplicated, so set operations on them
+    (degree, triangle checks) reduce to slicing and merge-intersection.
+    """
+
+    def __init__(self, names, nodes, indptr, indices):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.nodes = nodes
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_edges(cls, names, nodes, edges):
+        """
+        Builds the CSR arrays from (src_id, tgt_id) pairs.
+        Edges are symmetrized; duplicate edges collapse to one neighbor entry
+        and self loops are dropped.
+        """
+        adj = [set() for _ in names]
+        for u, v in edges:
+            if u == v:
+                continue
+            adj[u].add(v)
+            adj[v].add(u)
+
+        indptr = array("q", [0])
+        indices = array("q")
+        for nbrs in adj:
+            indices.extend(sorted(nbrs))
+            indptr.append(len(indices))
+
+        return cls(names, nodes, indptr, indices)
+
+    @classmethod
+    def from_metta_file(cls, path):
+        """
+        Parses a galaxy_data_full.metta style file.
+        `(: sym Type)` lines with a valid type become query nodes,
+        `(PRED src tgt)` lines with a GDS predicate become edges.
+        A symbol declared under two types is listed twice, like `get-all-nodes`.
+        """
+        names = []
+        index = {}
+        nodes = []
+        seen_nodes = set()
+        edges = []
+
+        def intern(sym):
+            i = index.get(sym)
+            if i is None:
+                i = len(names)
+                index[sym] = i
+                names.append(sym)
+            return i
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                m = ATOM_RE.match(line)
+                if not m:
+                    continue
+                head, a, b = m.groups()
+                if head == ":":
+                    if b in VALID_TYPES:
+                        i = intern(a)
+                        if (i, b) not in seen_nodes:
+                            seen_nodes.add((i, b))
+                            nodes.append(i)
+                elif head in GDS_EDGES:
+                    edges.append((intern(a), intern(b)))
+
+        return cls.from_edges(names, nodes, edges)
+
+    def neighbors(self, i):
+        return self.indices[self.indptr[i] : self.indptr[i + 1]]
+
+    def degree(self, i):
+        return self.indptr[i + 1] - self.indptr[i]
+
+    def connected(self, u, v):
+        """Binary search for v in the sorted neighbor list of u."""
+        lo, hi = self.indptr[u], self.indptr[u + 1]
+        indices = self.indices
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if indices[mid] < v:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < self.indptr[u + 1] and indices[lo] == v
+
+    def common_neighbors(self, u, v):
+        """Size of the intersection of two sorted neighbor lists."""
+        indices = self.indices
+        i, i_end = self.indptr[u], self.indptr[u + 1]
+        j, j_end = self.indptr[v], self.indptr[v + 1]
+        n = 0
+        while i < i_end and j < j_end:
+            a, b = indices[i], indices[j]
+            if a == b:
+                n += 1
+                i += 1
+                j += 1
+            elif a < b:
+                i += 1
+            else:
+                j += 1
+        return n
+
+    def triangle_pairs(self, i):
+        """
+        Ordered neighbor pairs (b, c), b != c, that are connected.
+        Equals `triangle-count` in galaxy_queries.metta (each link counted twice).
+        """
+        n = 0
+        for b in self.neighbors(i):
+            n += self.common_neighbors(i, b)
+        return n
+
+    def node_triangles(self, i):
+        """Triangles through node i, each counted once (`node-triangle-count`)."""
+        return self.triangle_pairs(i) // 2
+
+    def iter_triangles(self):
+        """
+        Yields every triangle exactly once as (u, v, w) with u < v < w, like
+        `ordered-triangle` (which orders by NODE_ID instead of CSR index).
+        """
+        indices = self.indices
+        for u in range(len(self.names)):
+            for v in self.neighbors(u):
+                if v <= u:
+                    continue
+                # Merge N(u) and N(v), keeping common neighbors above v
+                i, i_end = self.indptr[u], self.indptr[u + 1]
+                j, j_end = self.indptr[v], self.indptr[v + 1]
+                while i < i_end and j < j_end:
+                    a, b = indices[i], indices[j]
+                    if a == b:
+                        if a > v:
+                            yield u, v, a
+                        i += 1
+                        j += 1
+                    elif a < b:
+                        i += 1
+                    else:
+                        j += 1
+
+    def lcc(self, i):
+        k = self.degree(i)
+        if k < 2:
+            return 0.0
+        return self.triangle_pairs(i) / (k * (k - 1))
+
+    def open_triads(self, b):
+        """
+        Open triads a - b - c centred on b (a, c not adjacent), each counted once:
+        neighbor pairs minus closed ones, like `node-open-triad-count`.
+        """
+        k = self.degree(b)
+        return k * (k - 1) // 2 - self.node_triangles(b)
+
+    def random_neighbor_pair(self, b, rng):
+        """Two distinct neighbors of b (degree >= 2), uniformly at random."""
+        start = self.indptr[b]
+        k = self.indptr[b + 1] - start
+        i = rng.randrange(k)
+        j = rng.randrange(k - 1)
+        if j >= i:
+            j += 1
+        return self.indices[start + i], self.indices[start + j]
+
+    def iter_random_wedges(self, rng, batch=1024):
+        """
+        Endless stream of wedges (a, b, c), a < c, centred on b and drawn uniformly
+        over all wedges: the centre is weighted by k*(k-1)/2, then two distinct
+        neighbors are picked uniformly. Yields nothing if there are no wedges.
+        """
+        centres = [b for b in range(len(self.names)) if self.degree(b) >= 2]
+        weights = [self.degree(b) * (self.degree(b) - 1) for b in centres]
+        if not centres:
+            return
+        cum_weights = list(itertools.accumulate(weights))
+        while True:
+            for b in rng.choices(centres, cum_weights=cum_weights, k=batch):
+                a, c = self.random_neighbor_pair(b, rng)
+                yield (a, b, c) if a < c else (c, b, a)
+
+    def sample_open_triads(self, n, rng, max_tries=None):
+        """
+        Draws up to n distinct open triads (a, b, c), a < c, uniformly at random.
+        Closed wedges are rejected from a uniform wedge stream, so each open triad
+        is equally likely. Stops after `max_tries` draws (default 100 * n).
+        """
+        found = {}
+        wedges = self.iter_random_wedges(rng)
+        for a, b, c in itertools.islice(wedges, max_tries or 100 * n):
+            if not self.connected(a, c):
+                found[(a, b, c)] = None
+                if len(found) == n:
+                    break
+        return list(found)
+
+
+def wilson_interval(k, n, z):
+    """Wilson score interval for a proportion of k successes out of n."""
+    if n == 0:
+        return 0.0, 1.0
+    p = k / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def estimate_clustering(graph, wedge_samples, lcc_samples, rng, confidence=0.95):
+    """
+    Wedge-sampling estimates of per-node LCC and global transitivity.
+    LCC(b) is the closed fraction of the wedges centred on b: nodes with at most
+    `lcc_samples` wedges are enumerated exactly, the rest get `lcc_samples`
+    uniform wedges. Transitivity is the closed fraction of `wedge_samples`
+    wedges drawn uniformly from the whole graph.
+    Returns (raw_lcc aligned with graph.nodes, estimate dict with intervals).
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    lcc = {}
+    node_var = {}
+    max_half = 0.0
+    exact = 0
+    sampled = 0
+    total_wedges = 0
+    for b in set(graph.nodes):
+        k = graph.degree(b)
+        wedges = k * (k - 1) // 2
+        total_wedges += wedges
+        nbrs = graph.neighbors(b)
+        if wedges <= lcc_samples:
+            # Few enough wedges to check every pair (binary searches, no merges
+            # against hub-sized neighbor lists)
+            closed = sum(
+                1 for a, c in itertools.combinations(nbrs, 2) if graph.connected(a, c)
+            )
+            lcc[b] = closed / wedges if wedges else 0.0
+            exact += 1
+            continue
+        closed = 0
+        for _ in range(lcc_samples):
+            if graph.connected(*graph.random_neighbor_pair(b, rng)):
+                closed += 1
+        p = closed / lcc_samples
+        lcc[b] = p
+        node_var[b] = p * (1 - p) / lcc_samples
+        lo, hi = wilson_interval(closed, lcc_samples, z)
+        max_half = max(max_half, (hi - lo) / 2)
+        sampled += 1
+
+    # Averaged over graph.nodes like the report; a node listed m times
+    # contributes m^2 times its variance, other nodes are independent
+    raw_lcc = [lcc[i] for i in graph.nodes]
+    n = len(raw_lcc)
+    avg = sum(raw_lcc) / n if n else 0.0
+    multiplicity = Counter(graph.nodes)
+    variance = sum(multiplicity[b] ** 2 * v for b, v in node_var.items())
+    half = z * math.sqrt(variance) / n if n else 0.0
+
+    closed = 0
+    drawn = 0
+    for a, _, c in itertools.islice(graph.iter_random_wedges(rng), wedge_samples):
+        drawn += 1
+        if graph.connected(a, c):
+            closed += 1
+    p = closed / drawn if drawn else 0.0
+    lo, hi = wilson_interval(closed, drawn, z)
+
+    estimate = {
+        "method": "wedge_sampling",
+        "confidence": confidence,
+        "global": {"value": p, "ci": [lo, hi], "samples": drawn},
+        "local_avg": {"value": avg, "ci": [max(0.0, avg - half), min(1.0, avg + half)]},
+        "local_max_halfwidth": max_half,
+        "lcc_samples_per_node": lcc_samples,
+        "exact_nodes": exact,
+        "sampled_nodes": sampled,
+        # Every triangle closes 3 wedges: T = transitivity * wedges / 3
+        "triangles": {
+            "value": p * total_wedges / 3,
+            "ci": [lo * total_wedges / 3, hi * total_wedges / 3],
+        },
+        "wedges": total_wedges,
+    }
+    return raw_lcc, estimate
+
+
+def hub_cutoff(degrees, top_k, threshold):
+    """
+    Smallest degree reported as a hub: `threshold`, raised to the k-th largest
+    degree when `top_k` is set, so nodes tied with the k-th one are kept too.
+    heapq.nlargest keeps a bounded heap of k entries instead of sorting.
+    Matches `top-hubs` in galaxy_queries.metta.
+    """
+    if top_k > 0:
+        top = heapq.nlargest(top_k, degrees)
+        if len(top) == top_k:
+            return max(top[-1], threshold)
+    return threshold
+
+
+def compute_gds_metrics(graph, hub_threshold=3, top_k=0):
+    """
+    Computes the raw per-node values that galaxy_queries.metta produces.
+    Returns the same inputs `process_gds_results` accumulates from atoms;
+    triangle_count and opentriad_count are exact counts of distinct motifs.
+    With `top_k`, only the k highest-degree hubs (and ties) are returned.
+    """
+    raw_degrees = []
+    raw_lcc = []
+    hubs = []
+    triangle_pairs = 0
+    opentriad_count = 0
+    seen = set()
+    cutoff = hub_cutoff(
+        (graph.degree(i) for i in set(graph.nodes)), top_k, hub_threshold
+    )
+
+    for i in graph.nodes:
+        k = graph.degree(i)
+        raw_degrees.append(k)
+        pairs = graph.triangle_pairs(i)
+        raw_lcc.append(pairs / (k * (k - 1)) if k >= 2 else 0.0)
+        if i not in seen:
+            # Each triangle has 2 ordered pairs at each of its 3 corners
+            seen.add(i)
+            triangle_pairs += pairs
+            opentriad_count += k * (k - 1) // 2 - pairs // 2
+        if k >= cutoff:
+            hubs.append({"node": graph.names[i], "degree": k})
+
+    triangle_count = triangle_pairs // 6
+    return raw_degrees, raw_lcc, triangle_count, opentriad_count, hubs
+
+
+def estimate_gds_metrics(
+    graph, wedge_samples, lcc_samples, rng, hub_threshold=3, top_k=0
+):
+    """
+    Like compute_gds_metrics, but LCC, triangles and open triads are wedge-sampling
+    estimates (degrees and hubs stay exact). Also returns the estimate dict.
+    """
+    raw_degrees = []
+    hubs = []
+    cutoff = hub_cutoff(
+        (graph.degree(i) for i in set(graph.nodes)), top_k, hub_threshold
+    )
+    for i in graph.nodes:
+        k = graph.degree(i)
+        raw_degrees.append(k)
+        if k >= cutoff:
+            hubs.append({"node": graph.names[i], "degree": k})
+
+    raw_lcc, estimate = estimate_clustering(graph, wedge_samples, lcc_samples, rng)
+    triangle_count = round(estimate["triangles"]["value"])
+    opentriad_count = estimate["wedges"] - 3 * triangle_count
+    return raw_degrees, raw_lcc, triangle_count, opentriad_count, hubs, estimate
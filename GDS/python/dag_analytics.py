@@ -0,0 +1,314 @@
+import argparse
+import json
+import os
+import statistics
+import time
+from array import array
+from collections import Counter
+
+from csr_graph import ATOM_RE
+from json_to_metta import OUTPUT_PATH, SYMBOLS_PATH, load_symbol_table
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DAG_PATH = os.path.join(BASE_DIR, "../metta/galaxy_dag.metta")
+
+
+class StepDAG:
+    """
+    The FEEDS_INTO step graphs of every workflow in one integer-indexed structure:
+    steps are numbered globally, `workflow_of[s]` is the owning workflow and the
+    successors are stored in CSR form, so a single pass covers all workflows.
+    """
+
+    def __init__(self, steps, workflows, workflow_of, tool_of, indptr, indices):
+        self.steps = steps
+        self.workflows = workflows
+        self.workflow_of = workflow_of
+        self.tool_of = tool_of
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_metta_file(cls, path):
+        """
+        Reads HAS_STEP, FEEDS_INTO and STEP_USES_TOOL atoms (and the Workflow
+        declarations) from a galaxy_data_full.metta style file. Duplicate edges
+        collapse to one and self loops are dropped.
+        """
+        workflows = []
+        has_step = []
+        feeds = set()
+        uses_tool = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                m = ATOM_RE.match(line)
+                if not m:
+                    continue
+                head, a, b = m.groups()
+                if head == ":" and b == "Workflow":
+                    workflows.append(a)
+                elif head == "HAS_STEP":
+                    has_step.append((a, b))
+                elif head == "FEEDS_INTO" and a != b:
+                    feeds.add((a, b))
+                elif head == "STEP_USES_TOOL":
+                    uses_tool.setdefault(a, b)
+
+        wf_index = {}
+        for wf in workflows + [wf for wf, _ in has_step]:
+            wf_index.setdefault(wf, len(wf_index))
+        steps = []
+        step_index = {}
+        workflow_of = array("q")
+        for wf, step in has_step:
+            if step not in step_index:
+                step_index[step] = len(steps)
+                steps.append(step)
+                workflow_of.append(wf_index[wf])
+
+        succ = [[] for _ in steps]
+        for a, b in sorted(feeds):
+            # Both ends are steps of the same workflow by construction
+            if a in step_index and b in step_index:
+                succ[step_index[a]].append(step_index[b])
+        indptr = array("q", [0])
+        indices = array("q")
+        for nxt in succ:
+            indices.extend(nxt)
+            indptr.append(len(indices))
+
+        tool_of = [uses_tool.get(s) for s in steps]
+        return cls(steps, list(wf_index), workflow_of, tool_of, indptr, indices)
+
+    def successors(self, s):
+        return self.indices[self.indptr[s] : self.indptr[s + 1]]
+
+    def layers(self):
+        """
+        Kahn's algorithm over all workflows at once, one frontier per round.
+        A step joins the frontier of round r when its last predecessor leaves
+        round r - 1, so r is its depth (longest chain of predecessors) and that
+        predecessor is its parent on a longest path. Steps on or after a cycle
+        are never released and keep depth -1.
+        Returns (depth, parent, order), order being a topological order.
+        """
+        n = len(self.steps)
+        indegree = array("q", bytes(8 * n))
+        for v in self.indices:
+            indegree[v] += 1
+        depth = array("q", [-1]) * n
+        parent = array("q", [-1]) * n
+
+        frontier = [s for s in range(n) if indegree[s] == 0]
+        order = []
+        r = 0
+        while frontier:
+            nxt = []
+            for u in frontier:
+                depth[u] = r
+                for v in self.successors(u):
+                    indegree[v] -= 1
+                    if indegree[v] == 0:
+                        parent[v] = u
+                        nxt.append(v)
+            order.extend(frontier)
+            frontier = nxt
+            r += 1
+        return depth, parent, order
+
+    def reach_counts(self, order):
+        """
+        Number of steps reachable from each step, from one sweep in reverse
+        topological order. Reachable sets are bitsets over the step's position
+        within its workflow, which stay small because no edge leaves a workflow.
+        """
+        local = array("q", bytes(8 * len(self.steps)))
+        sizes = Counter()
+        for s, w in enumerate(self.workflow_of):
+            local[s] = sizes[w]
+            sizes[w] += 1
+
+        reach = {}
+        counts = array("q", bytes(8 * len(self.steps)))
+        for u in reversed(order):
+            bits = 0
+            for v in self.successors(u):
+                bits |= reach.get(v, 0) | (1 << local[v])
+            reach[u] = bits
+            counts[u] = bin(bits).count("1")
+        return counts
+
+
+def analyze_dag(dag):
+    """
+    Per-workflow depth (number of layers), width of each layer, longest path
+    (steps and the tools they use) and reachable step pairs.
+    Returns (workflow rows, per-step depth, per-step reach count).
+    """
+    depth, parent, order = dag.layers()
+    reach = dag.reach_counts(order)
+
+    members = [[] for _ in dag.workflows]
+    for s, w in enumerate(dag.workflow_of):
+        members[w].append(s)
+
+    rows = []
+    for w, wf in enumerate(dag.workflows):
+        steps = members[w]
+        placed = [s for s in steps if depth[s] >= 0]
+        widths = Counter(depth[s] for s in placed)
+        n_layers = len(widths)
+        chain = []
+        if placed:
+            # Deepest step (smallest id on ties), then back along the parents
+            s = max(placed, key=lambda s: (depth[s], -s))
+            while s >= 0:
+                chain.append(s)
+                s = parent[s]
+            chain.reverse()
+        rows.append(
+            {
+                "workflow": wf,
+                "steps": len(steps),
+                "edges": sum(len(dag.successors(s)) for s in steps),
+                "depth": n_layers,
+                "widths": [widths[r] for r in range(n_layers)],
+                "maxWidth": max(widths.values(), default=0),
+                "parallelism": len(placed) / n_layers if n_layers else 0.0,
+                "criticalSteps": [dag.steps[s] for s in chain],
+                "criticalPath": [dag.tool_of[s] for s in chain if dag.tool_of[s]],
+                "reachablePairs": sum(reach[s] for s in steps),
+                "cyclicSteps": len(steps) - len(placed),
+            }
+        )
+    return rows, depth, reach
+
+
+def dag_report(rows, labels=None):
+    """The `dag` section of gds_metrics.json: totals plus one entry per workflow."""
+    with_steps = [row for row in rows if row["steps"]]
+    depths = [row["depth"] for row in with_steps]
+    report = {
+        "workflows": len(with_steps),
+        "steps": sum(row["steps"] for row in with_steps),
+        "edges": sum(row["edges"] for row in with_steps),
+        "cyclicWorkflows": sum(1 for row in with_steps if row["cyclicSteps"]),
+        "reachablePairs": sum(row["reachablePairs"] for row in with_steps),
+    }
+    if depths:
+        report["depth"] = {
+            "max": max(depths),
+            "avg": statistics.mean(depths),
+            "p50": statistics.median(depths),
+        }
+        report["maxWidth"] = max(row["maxWidth"] for row in with_steps)
+        report["parallelism"] = {
+            "avg": statistics.mean(row["parallelism"] for row in with_steps)
+        }
+
+    per_workflow = []
+    for row in sorted(with_steps, key=lambda r: (-r["depth"], r["workflow"])):
+        entry = {k: v for k, v in row.items() if k != "criticalSteps"}
+        if labels:
+            wf = labels.get(row["workflow"])
+            if wf:
+                entry["label"] = wf["label"]
+            entry["criticalPathLabels"] = [
+                labels[t]["label"] if t in labels else t for t in row["criticalPath"]
+            ]
+        per_workflow.append(entry)
+    report["perWorkflow"] = per_workflow
+    return report
+
+
+def iter_dag_atoms(dag, rows, depth, reach):
+    """Yields the DAG results as atoms: per workflow, per layer and per step."""
+    for row in rows:
+        if not row["steps"]:
+            continue
+        wf = row["workflow"]
+        yield f"(WorkflowDepth {wf} {row['depth']})"
+        for r, width in enumerate(row["widths"]):
+            yield f"(LayerWidth {wf} {r} {width})"
+        yield f"(CriticalPath {wf} ({' '.join(row['criticalPath'])}))"
+    for s, step in enumerate(dag.steps):
+        if depth[s] >= 0:
+            yield f"(StepDepth {step} {depth[s]})"
+        yield f"(StepReach {step} {reach[s]})"
+
+
+def run_dag_analytics(data_file, atoms_path=DAG_PATH, labels=None):
+    """
+    DAG stage: analyzes every workflow's FEEDS_INTO graph in one batch, writes
+    the atoms to `atoms_path` and returns the report section.
+    """
+    print(f"\n[DAG] FEEDS_INTO analytics for {os.path.basename(data_file)}")
+    print("-" * 50)
+    t0 = time.time()
+    dag = StepDAG.from_metta_file(data_file)
+    t1 = time.time()
+    rows, depth, reach = analyze_dag(dag)
+    t2 = time.time()
+    report = dag_report(rows, labels)
+
+    with open(atoms_path, "w", encoding="utf-8") as f:
+        f.write(";; Workflow DAG analytics (generated by dag_analytics.py)\n")
+        for atom in iter_dag_atoms(dag, rows, depth, reach):
+            f.write(atom + "\n")
+
+    print(
+        f"Loaded:       {len(dag.steps)} steps, {len(dag.indices)} edges in {t1 - t0:.4f} sec"
+    )
+    print(f"Analyzed:     {report['workflows']} workflows in {t2 - t1:.4f} sec")
+    if "depth" in report:
+        print(
+            f"Depth:        max {report['depth']['max']}, avg {report['depth']['avg']:.2f}; "
+            f"max width {report['maxWidth']}, "
+            f"avg parallelism {report['parallelism']['avg']:.2f}"
+        )
+    if report["cyclicWorkflows"]:
+        print(f"Warning:      {report['cyclicWorkflows']} workflows contain a cycle")
+    print(f"Atoms:        {os.path.abspath(atoms_path)}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Depth, layer widths, critical paths and reachability of every workflow DAG."
+    )
+    parser.add_argument("--data", default=OUTPUT_PATH, help="Data file (.metta).")
+    parser.add_argument("--symbols", default=SYMBOLS_PATH, help="Symbol table (JSON).")
+    parser.add_argument(
+        "--atoms", default=DAG_PATH, help="Where the atoms are written."
+    )
+    parser.add_argument(
+        "--json", default=None, help="Also write the report section to this file."
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="Deepest workflows to print."
+    )
+    args = parser.parse_args()
+
+    labels = load_symbol_table(args.symbols) if os.path.exists(args.symbols) else None
+    report = run_dag_analytics(args.data, args.atoms, labels)
+
+    print(
+        f"\n  {'Workflow':<50} | {'Steps':>5} | {'Depth':>5} | {'Width':>5} | Critical path"
+    )
+    print("  " + "-" * 100)
+    for row in report["perWorkflow"][: args.top]:
+        name = row.get("label", row["workflow"])
+        path = row.get("criticalPathLabels", row["criticalPath"])
+        print(
+            f"  {name[:50]:<50} | {row['steps']:>5} | {row['depth']:>5} | "
+            f"{row['maxWidth']:>5} | {' -> '.join(path)[:60]}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n  Report saved to: {os.path.abspath(args.json)}")
+
+
+if __name__ == "__main__":
+    main()
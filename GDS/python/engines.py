@@ -0,0 +1,314 @@
+import abc
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import time
+from collections import Counter
+
+import run_gds
+from csr_graph import CSRGraph
+from json_stream import max_rss_mb
+from metta_script import iter_metta_forms, label_directives, split_metta_script
+from result_decoder import canonical
+
+# The GDS scripts are written against the MORK space
+MORK_SPACE_RE = re.compile(r"&mork\b")
+
+
+class Engine(abc.ABC):
+    """
+    One MeTTa backend behind a common interface: load a script file or text,
+    add plain atoms, run directives and iterate results per directive.
+    Text that names &mork is retargeted to `space` on backends without MORK.
+    """
+
+    name = None
+    space = "&self"
+
+    def retarget(self, text):
+        if self.space == "&mork":
+            return text
+        return MORK_SPACE_RE.sub(self.space, text)
+
+    def load_file(self, path):
+        """Loads a MeTTa script (definitions and directives)."""
+        with open(path, "r", encoding="utf-8") as f:
+            self.load_string(f.read())
+
+    @abc.abstractmethod
+    def load_string(self, text):
+        """Loads MeTTa text (definitions and directives)."""
+
+    def add_atoms(self, text):
+        """Adds plain atoms (no directives) to the space."""
+        self.load_string(text)
+
+    @abc.abstractmethod
+    def run(self, text):
+        """Runs the text; returns one result list per `!` directive."""
+
+    def iter_results(self, directives):
+        """
+        Runs directives one at a time and yields (name, results) like
+        run_gds.iter_directives, names from label_directives.
+        """
+        for name, directive in label_directives(directives):
+            results = self.run(directive)
+            yield name, results[0] if results else []
+
+
+class HyperonEngine(Engine):
+    """hyperon.MeTTa: the reference interpreter, atoms in &self."""
+
+    name = "hyperon"
+
+    def __init__(self):
+        from hyperon import MeTTa
+
+        self.metta = MeTTa()
+
+    def load_string(self, text):
+        self.metta.run(self.retarget(text))
+
+    def run(self, text):
+        return self.metta.run(self.retarget(text))
+
+
+class PeTTaEngine(Engine):
+    """PeTTa (MeTTa compiled to Prolog), atoms in &self."""
+
+    name = "petta"
+
+    def __init__(self):
+        if run_gds.petta is None:
+            raise ImportError(f"Could not import 'petta' from {run_gds.petta_path}")
+        self.agent = run_gds.petta.PeTTa(verbose=False)
+
+    def load_string(self, text):
+        self.agent.process_metta_string(self.retarget(text))
+
+    def run(self, text):
+        # process_metta_string returns one flat list, so directives go one at a time
+        forms = list(iter_metta_forms(self.retarget(text).splitlines(True)))
+        definitions = [f for f in forms if not f.startswith("!")]
+        if definitions:
+            self.agent.process_metta_string("\n".join(definitions))
+        return [
+            self.agent.process_metta_string(f) or [] for f in forms if f.startswith("!")
+        ]
+
+
+class MorkEngine(PeTTaEngine):
+    """PeTTa with the MORK space: atoms in &mork, bulk loads through the FFI."""
+
+    name = "mork"
+    space = "&mork"
+
+    def load_file(self, path):
+        self.agent.load_metta_file(path)
+
+    def add_atoms(self, text):
+        run_gds.mork_add_atoms(text)
+
+
+BACKENDS = {
+    "hyperon": HyperonEngine,
+    "petta": PeTTaEngine,
+    "mork": MorkEngine,
+}
+
+
+def make_engine(name):
+    """Returns a fresh engine; raises ImportError if the backend is not installed."""
+    return BACKENDS[name]()
+
+
+def run_workload(backend, data_file, schema_file, queries_file, overrides, precompute):
+    """
+    Worker process for compare_backends: loads the data, schema and query
+    definitions into a fresh `backend` engine and runs the query directives.
+    Results come back in canonical form (result_decoder.canonical).
+    """
+    out = {"backend": backend, "error": None, "steps": []}
+    t0 = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = make_engine(backend)
+    except ImportError as e:
+        out["error"] = f"unavailable: {e}"
+        return out
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            with open(data_file, "r", encoding="utf-8") as f:
+                engine.add_atoms(f.read())
+            engine.load_file(schema_file)
+            if precompute:
+                graph = CSRGraph.from_metta_file(data_file)
+                engine.add_atoms("\n".join(run_gds.iter_adjacency_atoms(graph)))
+            t1 = time.perf_counter()
+            out["load_sec"] = t1 - t0
+
+            definitions, directives = split_metta_script(queries_file, overrides)
+            engine.load_string(definitions)
+            t = time.perf_counter()
+            out["definitions_sec"] = t - t1
+            for name, results in engine.iter_results(directives):
+                sec = time.perf_counter() - t
+                out["steps"].append((name, sec, [canonical(r) for r in results]))
+                t = time.perf_counter()
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+    out["peak_rss_mb"] = max_rss_mb()
+    return out
+
+
+def diff_results(expected, actual):
+    """(missing, extra) results of `actual` against `expected`, as multisets."""
+    missing = Counter(expected) - Counter(actual)
+    extra = Counter(actual) - Counter(expected)
+    return sorted(missing.elements()), sorted(extra.elements())
+
+
+def compare_backends(
+    backends,
+    data_file,
+    schema_file,
+    queries_file,
+    overrides=None,
+    precompute=False,
+    json_path="backend_comparison.json",
+):
+    """
+    Runs the same workload on each backend, one fresh process at a time so
+    they neither share a Prolog runtime nor compete for cores, then prints
+    load and per-directive query times and the results that differ from the
+    first backend that ran. Returns the comparison, also written to json_path.
+    """
+    print(f"\n[Compare Backends] {', '.join(backends)}")
+    print(f"  Data: {os.path.basename(data_file)}")
+    runs = []
+    ctx = multiprocessing.get_context("spawn")
+    for backend in backends:
+        print(f"  Running {backend}...")
+        with ctx.Pool(1) as pool:
+            runs.append(
+                pool.apply(
+                    run_workload,
+                    (
+                        backend,
+                        data_file,
+                        schema_file,
+                        queries_file,
+                        overrides,
+                        precompute,
+                    ),
+                )
+            )
+
+    print(
+        f"\n  {'Backend':<8} | {'Load sec':>9} | {'Defs sec':>9} | {'Query sec':>9} | {'Results':>8} | {'Peak MB':>8}"
+    )
+    print("  " + "-" * 68)
+    for run in runs:
+        if "load_sec" not in run:
+            print(f"  {run['backend']:<8} | {run['error']}")
+            continue
+        query_sec = sum(sec for _, sec, _ in run["steps"])
+        count = sum(len(results) for _, _, results in run["steps"])
+        print(
+            f"  {run['backend']:<8} | {run['load_sec']:>9.4f} | {run.get('definitions_sec', 0.0):>9.4f} | "
+            f"{query_sec:>9.4f} | {count:>8} | {run['peak_rss_mb']:>8.1f}"
+        )
+        if run["error"]:
+            print(f"  {'':<8} | stopped: {run['error']}")
+
+    ran = [run for run in runs if run["steps"]]
+    if ran:
+        print(
+            f"\n  {'Directive':<40} | " + " | ".join(f"{r['backend']:>9}" for r in ran)
+        )
+        print("  " + "-" * (43 + 12 * len(ran)))
+        for i, (name, _, _) in enumerate(ran[0]["steps"]):
+            secs = [
+                f"{r['steps'][i][1]:>9.4f}" if i < len(r["steps"]) else f"{'-':>9}"
+                for r in ran
+            ]
+            print(f"  {name[:40]:<40} | " + " | ".join(secs))
+
+    # Installed backends that failed (at load or part way) are compared too, so
+    # directives they did not run count as mismatches instead of being skipped
+    compared = [
+        run for run in runs if not (run["error"] or "").startswith("unavailable")
+    ]
+    differences = []
+    if ran and len(compared) > 1:
+        base = ran[0]
+        print(f"\n[Differences] against {base['backend']}")
+        for run in compared:
+            if run is base:
+                continue
+            pairs = itertools.zip_longest(base["steps"], run["steps"])
+            for expected_step, actual_step in pairs:
+                name = (expected_step or actual_step)[0]
+                expected = expected_step[2] if expected_step else []
+                actual = actual_step[2] if actual_step else []
+                missing, extra = diff_results(expected, actual)
+                not_run = None
+                if actual_step is None:
+                    not_run = f"not run on {run['backend']}: {run['error']}"
+                elif expected_step is None:
+                    not_run = f"not run on {base['backend']}: {base['error']}"
+                if missing or extra or not_run:
+                    differences.append(
+                        {
+                            "backend": run["backend"],
+                            "directive": name,
+                            "missing": len(missing),
+                            "extra": len(extra),
+                            "not_run": not_run,
+                            "examples": (missing[:3], extra[:3]),
+                        }
+                    )
+        if not differences:
+            print("  OK: every directive returned the same results.")
+        for d in differences:
+            print(
+                f"  ! {d['backend']} | {d['directive']} | "
+                f"{d['missing']} missing, {d['extra']} extra"
+            )
+            if d["not_run"]:
+                print(f"      {d['not_run']}")
+            for r in d["examples"][0]:
+                print(f"      - {r}")
+            for r in d["examples"][1]:
+                print(f"      + {r}")
+
+    comparison = {
+        "data_file": data_file,
+        "overrides": overrides or {},
+        "precompute": precompute,
+        "backends": {
+            run["backend"]: {
+                "error": run["error"],
+                "load_sec": run.get("load_sec"),
+                "definitions_sec": run.get("definitions_sec"),
+                "peak_rss_mb": run.get("peak_rss_mb"),
+                "directives": [
+                    {"name": name, "sec": sec, "results": len(results)}
+                    for name, sec, results in run["steps"]
+                ],
+            }
+            for run in runs
+        },
+        "differences": differences,
+    }
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(comparison, f, indent=2)
+        print(f"\n  Comparison saved to: {os.path.abspath(json_path)}")
+    return comparison
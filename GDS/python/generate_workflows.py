@@ -0,0 +1,191 @@
+import argparse
+import copy
+import itertools
+import json
+import os
+import random
+import time
+
+from json_stream import iter_json_records
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SEED_PATH = os.path.join(BASE_DIR, "../../data/raw/iwc_full.json")
+
+
+class CorpusModel:
+    """
+    Empirical model of an IWC dump, used to generate synthetic workflows that
+    keep its shape: workflow sizes (input vs tool steps), tool popularity,
+    per-tool inputs/outputs and the number of input_connections per step.
+    """
+
+    def __init__(self, seed_path=SEED_PATH):
+        self.categories = []
+        self.workflows_per_record = []
+        self.shapes = []
+        self.input_steps = []
+        self.tool_steps = []
+        self.conn_counts = []
+
+        for entry in iter_json_records(seed_path):
+            cat = entry.get("category", "Uncategorized")
+            if cat not in self.categories:
+                self.categories.append(cat)
+            workflows = entry.get("workflow_files", [])
+            self.workflows_per_record.append(len(workflows))
+
+            for wf in workflows:
+                steps = wf.get("steps", {})
+                steps = steps if isinstance(steps, list) else list(steps.values())
+                n_inputs = 0
+                n_tools = 0
+                for step in steps:
+                    if step.get("tool_id"):
+                        n_tools += 1
+                        self.tool_steps.append(step)
+                        conns = step.get("input_connections") or {}
+                        self.conn_counts.append(len(conns))
+                    else:
+                        n_inputs += 1
+                        self.input_steps.append(step)
+                self.shapes.append((n_inputs, n_tools))
+
+        self.real_tools = sorted({s["tool_id"] for s in self.tool_steps})
+
+    def tool_sampler(self, scale, rng):
+        """
+        Returns a function drawing k (template_step, tool_id) pairs.
+        Real tools keep their observed step counts as weights. The vocabulary
+        grows with sqrt(scale) (Heaps' law); each synthetic tool borrows a
+        template and a popularity drawn from the real tools, so the skew is kept.
+        """
+        by_tool = {}
+        for step in self.tool_steps:
+            by_tool.setdefault(step["tool_id"], []).append(step)
+
+        choices = [(tool_id, tool_id) for tool_id in self.real_tools]
+        weights = [len(by_tool[tool_id]) for tool_id in self.real_tools]
+
+        n_synthetic = int(len(self.real_tools) * (scale**0.5 - 1))
+        for k in range(n_synthetic):
+            template_id = rng.choice(self.real_tools)
+            choices.append((template_id, f"{template_id}_syn{k}"))
+            weights.append(len(by_tool[rng.choice(self.real_tools)]))
+
+        cum_weights = list(itertools.accumulate(weights))
+
+        def sample(k):
+            picks = rng.choices(choices, cum_weights=cum_weights, k=k)
+            return [(rng.choice(by_tool[t]), tool_id) for t, tool_id in picks]
+
+        return sample
+
+
+def make_workflow(model, sample_tools, rng, name):
+    """Builds one synthetic workflow with a connected step DAG."""
+    n_inputs, n_tools = rng.choice(model.shapes)
+    n_inputs = max(n_inputs, 1)
+
+    steps = []
+    for template in rng.sample(
+        model.input_steps, min(n_inputs, len(model.input_steps))
+    ):
+        step = copy.deepcopy(template)
+        step["input_connections"] = {}
+        steps.append(step)
+
+    for template, tool_id in sample_tools(n_tools):
+        step = copy.deepcopy(template)
+        step["tool_id"] = tool_id
+        i = len(steps)
+        n_conns = rng.choice(model.conn_counts)
+        conns = {}
+        for j in range(n_conns):
+            # Mostly wire to one of the last few steps, like a processing chain
+            if rng.random() < 0.7:
+                src = rng.randrange(max(0, i - 5), i)
+            else:
+                src = rng.randrange(i)
+            conns[f"input{j}"] = {"id": src, "output_name": "output"}
+        step["input_connections"] = conns
+        steps.append(step)
+
+    for i, step in enumerate(steps):
+        step["step_id"] = i
+
+    return {
+        "workflow_name": name,
+        "number_of_steps": len(steps),
+        "steps": steps,
+        "file_name": f"{name.replace(' ', '-')}.ga",
+        "raw_download_url": "",
+    }
+
+
+def generate(scale, out_path, seed_path=SEED_PATH, seed=0):
+    """
+    Writes an IWC-shaped JSON dump with `scale` times the seed workflow count.
+    Records are written one at a time, so memory does not grow with scale.
+    """
+    rng = random.Random(seed)
+    model = CorpusModel(seed_path)
+    sample_tools = model.tool_sampler(scale, rng)
+    n_workflows = max(1, round(len(model.shapes) * scale))
+
+    written = 0
+    n_records = 0
+    with open(out_path, "w", encoding="utf-8") as out:
+        out.write("[\n")
+        while written < n_workflows:
+            per_record = max(1, rng.choice(model.workflows_per_record))
+            per_record = min(per_record, n_workflows - written)
+            category = rng.choice(model.categories)
+            workflows = [
+                make_workflow(
+                    model, sample_tools, rng, f"Synthetic {category} {written + j}"
+                )
+                for j in range(per_record)
+            ]
+            record = {
+                "category": category,
+                "workflow_repository": f"synthetic-{n_records}",
+                "workflow_files": workflows,
+                "has_test_data": "False",
+                "has_readme": "False",
+                "has_dockstore_yml": "False",
+                "has_changelog": "False",
+                "readme_content": "",
+            }
+            if n_records:
+                out.write(",\n")
+            out.write(json.dumps(record))
+            written += per_record
+            n_records += 1
+        out.write("\n]\n")
+
+    return n_workflows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Size relative to the seed dump."
+    )
+    parser.add_argument("--output", required=True, help="Target JSON file.")
+    parser.add_argument(
+        "--seed-data", default=SEED_PATH, help="Real IWC dump to model."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    t0 = time.time()
+    n = generate(args.scale, args.output, args.seed_data, args.seed)
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(
+        f"Generated {n} workflows ({size_mb:.2f} MB) in {time.time() - t0:.2f} sec "
+        f"-> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
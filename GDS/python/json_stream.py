@@ -0,0 +1,83 @@
+import json
+import resource
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = " \t\r\n"
+
+
+def iter_json_records(path, chunk_size=CHUNK_SIZE):
+    """
+    Yields the elements of a top-level JSON array one at a time.
+    Only the current record is held in memory, so peak usage is bounded by
+    the largest record instead of the whole file. A top-level object is
+    yielded as a single record.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        eof = False
+        pos = 0
+        while pos == len(buf) and not eof:
+            more = f.read(chunk_size)
+            eof = not more
+            buf += more
+            pos = _skip_ws(buf, pos)
+
+        if buf[pos : pos + 1] != "[":
+            # Not an array: fall back to decoding the single document
+            record, _ = decoder.raw_decode(buf + f.read(), pos)
+            yield record
+            return
+        pos += 1
+
+        while True:
+            pos = _skip_ws(buf, pos)
+            if pos < len(buf) and buf[pos] == ",":
+                pos = _skip_ws(buf, pos + 1)
+            if pos < len(buf) and buf[pos] == "]":
+                return
+
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+                # A value touching the end of the buffer may be truncated
+                complete = end < len(buf) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+
+            if complete:
+                yield record
+                pos = end
+                continue
+
+            # Drop consumed input and read more; read size doubles with the
+            # buffer so records larger than a chunk are re-scanned O(log n) times
+            buf = buf[pos:]
+            pos = 0
+            more = f.read(max(chunk_size, len(buf)))
+            eof = not more
+            buf += more
+
+
+def _skip_ws(buf, pos):
+    while pos < len(buf) and buf[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def max_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def rss_mb():
+    """Current resident set size in MB; falls back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return max_rss_mb()
+    return pages * resource.getpagesize() / (1024 * 1024)
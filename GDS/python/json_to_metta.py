@@ -1,12 +1,33 @@
+import argparse
 import hashlib
 import json
 import os
 import re
+import shutil
+import tempfile
+from collections import Counter
+
+from csr_graph import GDS_EDGES
+from json_stream import iter_json_records, max_rss_mb
 
 # Define Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 JSON_PATH = os.path.join(BASE_DIR, "../../data/raw/iwc_full.json")
 OUTPUT_PATH = os.path.join(BASE_DIR, "../metta/galaxy_data_full.metta")
+SYMBOLS_PATH = os.path.join(BASE_DIR, "../metta/galaxy_data_full.symbols.json")
+MANIFEST_PATH = os.path.join(BASE_DIR, "../metta/galaxy_data_full.manifest.json")
+
+# Predicates that repeat per step and get a (WEIGHT pred src tgt n) multiplicity atom
+WEIGHTED_EDGES = (
+    "WORKFLOW_USES_TOOL",
+    "HAS_TOOL",
+    "TOOL_HAS_INPUT",
+    "TOOL_HAS_OUTPUT",
+    "FEEDS_INTO",
+)
+
+# Marks a data file written with --edge-index; the queries then use E/R atoms
+EDGE_INDEX_MARKER = "(EdgeIndex)"
 
 
 def clean_label(s):
@@ -48,116 +69,601 @@ def to_symbol(s, prefix):
     return f"{base}_{h}"
 
 
-def add_node(out, name, type_label):
+class SymbolTable:
+    """
+    Interns labels so each one is hashed once.
+    Keeps a symbol -> (integer id, original label, declared types) table that is
+    saved next to the .metta file for mapping symbols back to readable names.
+
+    Between begin_workflow() and end_workflow() the labels of that workflow and
+    its steps go to a local tier, which end_workflow() spills to a temporary file.
+    Only symbols that can recur across workflows (categories, tools, tool inputs
+    and outputs) stay in memory, so it does not grow with the number of steps.
+    """
+
+    def __init__(self, entries=None):
+        self._by_label = {}
+        self.entries = entries if entries is not None else {}
+        self.next_id = max((e["id"] for e in self.entries.values()), default=-1) + 1
+        self._scope = None
+        self._local_by_label = {}
+        self._local = {}
+        self._spill = None
+
+    @classmethod
+    def load(cls, path):
+        """Resumes a saved table; existing symbols keep their integer ids."""
+        return cls(load_symbol_table(path))
+
+    def begin_workflow(self, wf_name):
+        """
+        Interns `wf_name` and its step labels (step_label) locally until end_workflow().
+        Only valid if no other workflow has the same name, since the local
+        symbols are forgotten afterwards.
+        """
+        self._scope = (wf_name, step_label(wf_name, ""))
+
+    def end_workflow(self):
+        """Spills the local symbols of the current workflow."""
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile("w+", encoding="utf-8")
+        for sym, entry in self._local.items():
+            self._spill.write(json.dumps([sym, entry]) + "\n")
+        self._scope = None
+        self._local_by_label.clear()
+        self._local.clear()
+
+    def is_local(self, sym):
+        """True while `sym` is a symbol of the current workflow scope."""
+        return sym in self._local
+
+    def _in_scope(self, label):
+        return self._scope is not None and (
+            label == self._scope[0] or label.startswith(self._scope[1])
+        )
+
+    def symbol(self, label, prefix):
+        """Returns the cached symbol for (label, prefix), hashing on first sight."""
+        key = (label, prefix)
+        sym = self._by_label.get(key) or self._local_by_label.get(key)
+        if sym is None:
+            sym = to_symbol(label, prefix)
+            if sym not in self.entries and sym not in self._local:
+                tier = self._local if self._in_scope(label) else self.entries
+                tier[sym] = {"id": self.next_id, "label": label, "types": []}
+                self.next_id += 1
+            if sym in self._local:
+                self._local_by_label[key] = sym
+            else:
+                self._by_label[key] = sym
+        return sym
+
+    def declare(self, label, type_label):
+        """Returns the symbol for a node, recording its type on first declaration."""
+        sym = self.symbol(label, type_label.lower())
+        entry = self._local.get(sym) or self.entries[sym]
+        if type_label not in entry["types"]:
+            entry["types"].append(type_label)
+        return sym
+
+    def iter_entries(self):
+        """
+        Yields (symbol, entry) for every symbol, spilled ones included. A spilled
+        symbol that was interned again outside its workflow (a tool named like a
+        workflow, say) is merged into the in-memory entry and its id dropped.
+        """
+        if self._spill is not None:
+            self._spill.seek(0)
+            for line in self._spill:
+                sym, entry = json.loads(line)
+                kept = self.entries.get(sym)
+                if kept is None:
+                    yield sym, entry
+                    continue
+                for t in entry["types"]:
+                    if t not in kept["types"]:
+                        kept["types"].append(t)
+        yield from self.entries.items()
+
+    def discard_unused(self, live):
+        """
+        Drops the symbols that are not in `live` (no atom refers to them any more)
+        and returns them as (symbol, id) pairs, sorted by id.
+        """
+        stale = sorted(
+            ((sym, e["id"]) for sym, e in self.entries.items() if sym not in live),
+            key=lambda pair: pair[1],
+        )
+        for sym, _ in stale:
+            del self.entries[sym]
+        self._by_label = {k: v for k, v in self._by_label.items() if v in live}
+        return stale
+
+    def save(self, path):
+        """Writes the table one entry per line; returns the number of symbols."""
+        n = 0
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{")
+            for sym, entry in self.iter_entries():
+                f.write(f'{"," if n else ""}\n {json.dumps(sym)}: {json.dumps(entry)}')
+                n += 1
+            f.write("\n}\n")
+        return n
+
+    def write_ids(self, out, start=0):
+        """
+        Writes a (NODE_ID symbol id) atom for every symbol whose id is >= start.
+        The ids give queries a total order on nodes (e.g. u < v < w for triangles).
+        """
+        out.write("\n;; --- NODE IDS ---\n")
+        for sym, entry in self.iter_entries():
+            if entry["id"] >= start:
+                out.write(f"(NODE_ID {sym} {entry['id']})\n")
+
+
+class AtomWriter:
+    """
+    Collapses repeated atoms: a line is written the first time it is seen and
+    repeats of a weighted edge are counted for its WEIGHT atom. Lines that name a
+    workflow-local symbol (SymbolTable.begin_workflow) cannot recur in another
+    workflow, so they are only remembered until end_workflow(); what stays in
+    memory are the declarations and edges of shared symbols. WEIGHT and edge
+    index atoms are buffered in temporary files and appended by close().
+    """
+
+    def __init__(self, out, symbols=None, edge_index=False):
+        self.out = out
+        self.symbols = symbols
+        self.seen = set()
+        self.counts = Counter()
+        self.local_seen = set()
+        self.local_counts = Counter()
+        self.weights = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.index = None
+        if edge_index:
+            self.index = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+    def is_local(self, line):
+        if self.symbols is None:
+            return False
+        return any(self.symbols.is_local(t) for t in line[1:-2].split(" ")[1:])
+
+    def write(self, line, n=1):
+        local = self.is_local(line)
+        if line[1 : line.index(" ")] in WEIGHTED_EDGES:
+            counts = self.local_counts if local else self.counts
+            new = line not in counts
+            counts[line] += n
+        else:
+            seen = self.local_seen if local else self.seen
+            new = line not in seen
+            seen.add(line)
+        if new:
+            self.out.write(line)
+            if self.index is not None:
+                self.index.writelines(index_atoms(line))
+
+    def _buffer_weights(self, counts):
+        for line, n in counts.items():
+            weight = weight_atom(line, n)
+            if weight:
+                self.weights.write(weight)
+
+    def end_workflow(self):
+        """Buffers the WEIGHT atoms of the workflow's own edges and forgets its lines."""
+        self._buffer_weights(self.local_counts)
+        self.local_seen.clear()
+        self.local_counts.clear()
+
+    def close(self):
+        """Appends the WEIGHTS section and, with an edge index, the EDGE INDEX section."""
+        self.end_workflow()
+        self._buffer_weights(self.counts)
+        self.out.write("\n;; --- WEIGHTS ---\n")
+        self.weights.seek(0)
+        shutil.copyfileobj(self.weights, self.out)
+        self.weights.close()
+        if self.index is not None:
+            self.out.write("\n;; --- EDGE INDEX ---\n")
+            self.out.write(f"{EDGE_INDEX_MARKER}\n")
+            self.index.seek(0)
+            shutil.copyfileobj(self.index, self.out)
+            self.index.close()
+
+
+class AtomCounts(Counter):
+    """Sink for add_node/add_edge that only counts atom lines (one workflow's share)."""
+
+    def write(self, line):
+        self[line] += 1
+
+
+def weight_atom(line, n):
+    """
+    Returns the WEIGHT atom for an edge line of a weighted predicate seen n > 1 times.
+    Edges without a WEIGHT atom have multiplicity 1.
+    Example: (WEIGHT WORKFLOW_USES_TOOL workflow tool 10)
+    """
+    if n < 2:
+        return None
+    pred, rest = line[1:].split(" ", 1)
+    if pred not in WEIGHTED_EDGES:
+        return None
+    return f"(WEIGHT {pred} {rest[:-2]} {n})\n"
+
+
+def index_atoms(line):
+    """
+    Returns the (E src tgt pred) and (R tgt src pred) atoms for a GDS edge line.
+    Both start with the node they are looked up by, so one prefix match on a
+    node finds its neighbors in that direction over every predicate.
+    """
+    pred, rest = line[1:].split(" ", 1)
+    if pred not in GDS_EDGES:
+        return []
+    src, tgt = rest[:-2].split(" ")
+    return [f"(E {src} {tgt} {pred})\n", f"(R {tgt} {src} {pred})\n"]
+
+
+def load_symbol_table(path):
+    """
+    Loads a sidecar written by SymbolTable.save.
+    Returns {symbol: {"id": int, "label": str, "types": [str]}}.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def add_node(out, name, type_label, symbols):
     """
     Writes a node definition to the output file in MeTTa format.
     Example: (: symbol Type)
     """
     if not name:
         return
-    node_sym = to_symbol(name, type_label.lower())
+    node_sym = symbols.declare(name, type_label)
     out.write(f"(: {node_sym} {type_label})\n")
 
 
-def add_edge(out, pred, source, target):
+def add_edge(out, pred, source, target, symbols):
     """
     Writes a relationship (edge) between two nodes to the output file.
     Example: (PREDICATE source_node target_node)
     """
     if not source or not target:
         return
-    src_sym = to_symbol(source, "node")
-    tgt_sym = to_symbol(target, "node")
+    src_sym = symbols.symbol(source, "node")
+    tgt_sym = symbols.symbol(target, "node")
     out.write(f"({pred} {src_sym} {tgt_sym})\n")
 
 
-def process_workflow_data():
+def step_label(wf_name, step_id):
+    """Label of a workflow step; steps are named after their workflow."""
+    return f"{wf_name}_Step_{step_id}"
+
+
+def convert_workflow(out, cat_name, wf, symbols):
+    """
+    Writes the nodes and edges of a single workflow (steps, tools, flow).
+    """
+    wf_name = wf.get("workflow_name", "Unnamed Workflow")
+    add_node(out, wf_name, "Workflow", symbols)
+
+    # Edge: Category -> Workflow
+    add_edge(out, "HAS_WORKFLOW", cat_name, wf_name, symbols)
+
+    # Normalize 'steps' since it can be a list or dict in source
+    steps = wf.get("steps", {})
+    step_map = {}
+    if isinstance(steps, list):
+        for s in steps:
+            step_map[s.get("step_id")] = s
+    else:
+        for k, v in steps.items():
+            step_map[v.get("step_id")] = v
+
+    # Create nodes for each Step in the workflow
+    for step_id, step in step_map.items():
+        # Create unique Step ID: WorkflowName_StepID
+        step_unique_name = step_label(wf_name, step_id)
+        add_node(out, step_unique_name, "Step", symbols)
+        add_edge(out, "HAS_STEP", wf_name, step_unique_name, symbols)
+
+        # Identify Tool
+        tool_id = step.get("tool_id")
+        if tool_id:
+            add_node(out, tool_id, "Tool", symbols)
+            add_edge(
+                out,
+                "STEP_USES_TOOL",
+                step_unique_name,
+                tool_id,
+                symbols,
+            )
+            add_edge(out, "WORKFLOW_USES_TOOL", wf_name, tool_id, symbols)
+            add_edge(out, "HAS_TOOL", cat_name, tool_id, symbols)
+
+            # Tool Inputs
+            for inp in step.get("inputs", []):
+                inp_name = inp.get("name")
+                add_node(out, inp_name, "ToolInput", symbols)
+                add_edge(out, "TOOL_HAS_INPUT", tool_id, inp_name, symbols)
+
+            # Tool Outputs
+            for out_item in step.get("outputs", []):
+                out_name = out_item.get("name")
+                add_node(out, out_name, "ToolOutput", symbols)
+                add_edge(
+                    out,
+                    "TOOL_HAS_OUTPUT",
+                    tool_id,
+                    out_name,
+                    symbols,
+                )
+
+        # Process Connections (The Flow)
+        # "input_connections": { "input_name": { "id": source_step_id, ... } }
+        conns = step.get("input_connections", {})
+        for conn_name, source_info in conns.items():
+            # source_info might be a list or dict
+            if isinstance(source_info, dict):
+                src_id = source_info.get("id")
+            elif isinstance(source_info, list) and len(source_info) > 0:
+                src_id = source_info[0].get("id")
+            else:
+                continue
+
+            if src_id is not None:
+                src_unique_name = step_label(wf_name, src_id)
+                # Edge: Source Step -> This Step
+                add_edge(
+                    out,
+                    "FEEDS_INTO",
+                    src_unique_name,
+                    step_unique_name,
+                    symbols,
+                )
+
+
+def workflow_hash(cat_name, wf):
+    """Content hash of a workflow record, independent of key order in the dump."""
+    blob = json.dumps({"category": cat_name, "workflow": wf}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def process_workflow_data(
+    json_path=JSON_PATH,
+    output_path=OUTPUT_PATH,
+    symbols_path=SYMBOLS_PATH,
+    edge_index=False,
+):
     """
     Main processing pipeline.
-    Reads the raw JSON dataset, extracts entities and relationships,
-    and writes the complete knowledge graph to a .metta file.
+    Streams the raw JSON dataset one category at a time, extracts entities and
+    relationships, and writes the knowledge graph to a .metta file as it goes.
+    The interned symbol table is saved to `symbols_path`.
+    With `edge_index`, E/R index atoms (see index_atoms) are added for every edge.
     """
-    print(f"Reading {JSON_PATH}...")
-    with open(JSON_PATH, "r") as f:
-        data = json.load(f)
+    symbols = SymbolTable()
 
+    print(f"Reading {json_path}...")
+    # A workflow whose name occurs once keeps its step symbols only while it is
+    # converted; repeated names merge into one workflow, so theirs stay in memory
+    names = Counter(
+        wf.get("workflow_name", "Unnamed Workflow")
+        for entry in iter_json_records(json_path)
+        for wf in entry.get("workflow_files", [])
+    )
     print("Processing graph...")
-    print(f"Writing to {OUTPUT_PATH}...")
-    with open(OUTPUT_PATH, "w") as out:
-        out.write(";; Galaxy Knowledge Graph - Full Import\n\n")
-        out.write(";; --- ATOMS ---\n")
+    print(f"Writing to {output_path}...")
+    with open(output_path, "w") as f:
+        f.write(";; Galaxy Knowledge Graph - Full Import\n\n")
+        f.write(";; --- ATOMS ---\n")
+        out = AtomWriter(f, symbols, edge_index)
 
         # Iterate over categories in the JSON
-        for entry in data:
+        for entry in iter_json_records(json_path):
             cat_name = entry.get("category", "Uncategorized")
-            add_node(out, cat_name, "Category")
+            add_node(out, cat_name, "Category", symbols)
 
             # Process Workflows within each category
             for wf in entry.get("workflow_files", []):
                 wf_name = wf.get("workflow_name", "Unnamed Workflow")
-                add_node(out, wf_name, "Workflow")
-
-                # Edge: Category -> Workflow
-                add_edge(out, "HAS_WORKFLOW", cat_name, wf_name)
-
-                # Normalize 'steps' since it can be a list or dict in source
-                steps = wf.get("steps", {})
-                step_map = {}
-                if isinstance(steps, list):
-                    for s in steps:
-                        step_map[s.get("step_id")] = s
-                else:
-                    for k, v in steps.items():
-                        step_map[v.get("step_id")] = v
-
-                # Create nodes for each Step in the workflow
-                for step_id, step in step_map.items():
-                    # Create unique Step ID: WorkflowName_StepID
-                    step_unique_name = f"{wf_name}_Step_{step_id}"
-                    add_node(out, step_unique_name, "Step")
-                    add_edge(out, "HAS_STEP", wf_name, step_unique_name)
-
-                    # Identify Tool
-                    tool_id = step.get("tool_id")
-                    if tool_id:
-                        add_node(out, tool_id, "Tool")
-                        add_edge(out, "STEP_USES_TOOL", step_unique_name, tool_id)
-                        add_edge(out, "WORKFLOW_USES_TOOL", wf_name, tool_id)
-                        add_edge(out, "HAS_TOOL", cat_name, tool_id)
-
-                        # Tool Inputs
-                        for inp in step.get("inputs", []):
-                            inp_name = inp.get("name")
-                            add_node(out, inp_name, "ToolInput")
-                            add_edge(out, "TOOL_HAS_INPUT", tool_id, inp_name)
-
-                        # Tool Outputs
-                        for out_item in step.get("outputs", []):
-                            out_name = out_item.get("name")
-                            add_node(out, out_name, "ToolOutput")
-                            add_edge(out, "TOOL_HAS_OUTPUT", tool_id, out_name)
-
-                    # Process Connections (The Flow)
-                    # "input_connections": { "input_name": { "id": source_step_id, ... } }
-                    conns = step.get("input_connections", {})
-                    for conn_name, source_info in conns.items():
-                        # source_info might be a list or dict
-                        if isinstance(source_info, dict):
-                            src_id = source_info.get("id")
-                        elif isinstance(source_info, list) and len(source_info) > 0:
-                            src_id = source_info[0].get("id")
-                        else:
-                            continue
-
-                        if src_id is not None:
-                            src_unique_name = f"{wf_name}_Step_{src_id}"
-                            # Edge: Source Step -> This Step
-                            add_edge(
-                                out, "FEEDS_INTO", src_unique_name, step_unique_name
-                            )
+                if names[wf_name] == 1:
+                    symbols.begin_workflow(wf_name)
+                convert_workflow(out, cat_name, wf, symbols)
+                out.end_workflow()
+                symbols.end_workflow()
 
+        out.close()
+        symbols.write_ids(f)
+
+    n_symbols = symbols.save(symbols_path)
+    print(f"Saved {n_symbols} symbols to {symbols_path}")
     print("Done!")
 
 
+def delta_paths(output_path):
+    """Paths of the (add, remove) delta files that sit next to the data file."""
+    base = os.path.splitext(output_path)[0]
+    return f"{base}.delta.add.metta", f"{base}.delta.remove.metta"
+
+
+def diff_atom_counts(old, new, edge_index=False):
+    """
+    Compares two atom multisets and returns (added, removed) atom lines.
+    An atom is added or removed when its count crosses zero; a changed
+    multiplicity replaces the edge's WEIGHT atom. With `edge_index`, an edge's
+    E/R index atoms follow the edge.
+    """
+    added = []
+    removed = []
+    for line in new.keys() | old.keys():
+        o, n = old.get(line, 0), new.get(line, 0)
+        if o == n:
+            continue
+        if not o:
+            added.append(line)
+            if edge_index:
+                added.extend(index_atoms(line))
+        elif not n:
+            removed.append(line)
+            if edge_index:
+                removed.extend(index_atoms(line))
+        old_weight, new_weight = weight_atom(line, o), weight_atom(line, n)
+        if old_weight:
+            removed.append(old_weight)
+        if new_weight:
+            added.append(new_weight)
+    return sorted(added), sorted(removed)
+
+
+def process_incremental(
+    json_path=JSON_PATH,
+    output_path=OUTPUT_PATH,
+    symbols_path=SYMBOLS_PATH,
+    manifest_path=MANIFEST_PATH,
+    edge_index=False,
+):
+    """
+    Incremental pipeline keyed on per-workflow content hashes.
+    Only workflows whose hash differs from the manifest are converted again; the
+    rest reuse their recorded atoms. Writes add/remove delta files against the
+    previous state, then rewrites the data file, symbol table and manifest.
+    """
+    old_units = {}
+    old_edge_index = edge_index
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        old_units = manifest["units"]
+        old_edge_index = manifest.get("edge_index", False)
+    if old_units and os.path.exists(symbols_path):
+        symbols = SymbolTable.load(symbols_path)
+    else:
+        symbols = SymbolTable()
+
+    n_known = symbols.next_id
+
+    print(f"Reading {json_path}...")
+    units = {}
+    converted = 0
+    reused = 0
+    for entry in iter_json_records(json_path):
+        cat_name = entry.get("category", "Uncategorized")
+        cat_atoms = AtomCounts()
+        add_node(cat_atoms, cat_name, "Category", symbols)
+        units.setdefault(f"{cat_name}::", {"hash": None, "atoms": dict(cat_atoms)})
+
+        for wf in entry.get("workflow_files", []):
+            key = f"{cat_name}::{wf.get('workflow_name', 'Unnamed Workflow')}"
+            while key in units:
+                key += "+"
+            h = workflow_hash(cat_name, wf)
+            prev = old_units.get(key)
+            if prev and prev["hash"] == h:
+                units[key] = prev
+                reused += 1
+                continue
+            wf_atoms = AtomCounts()
+            convert_workflow(wf_atoms, cat_name, wf, symbols)
+            units[key] = {"hash": h, "atoms": dict(wf_atoms)}
+            converted += 1
+
+    dropped = len(old_units.keys() - units.keys())
+    print(f"Workflows: {converted} converted, {reused} unchanged, {dropped} removed")
+
+    # The manifest holds every workflow's atoms, so unlike a full conversion this
+    # mode keeps the whole atom multiset in memory
+    new_total = Counter()
+    for unit in units.values():
+        new_total.update(unit["atoms"])
+
+    # Symbols of removed or changed workflows that no atom refers to any more
+    # leave the table; their NODE_ID atoms go to the remove delta
+    live = {sym for line in new_total for sym in line[1:-2].split(" ")[1:]}
+    stale_ids = symbols.discard_unused(live)
+
+    # Rebuild the data file from the recorded atoms (no JSON re-conversion needed)
+    print(f"Writing to {output_path}...")
+    with open(output_path, "w") as f:
+        f.write(";; Galaxy Knowledge Graph - Full Import\n\n")
+        f.write(";; --- ATOMS ---\n")
+        out = AtomWriter(f, edge_index=edge_index)
+        for line, n in new_total.items():
+            out.write(line, n)
+        out.close()
+        symbols.write_ids(f)
+
+    if old_units and old_edge_index != edge_index:
+        print("Edge index setting changed: wrote a full snapshot (no delta).")
+    elif old_units:
+        old_total = Counter()
+        for unit in old_units.values():
+            old_total.update(unit["atoms"])
+        added, removed = diff_atom_counts(old_total, new_total, edge_index)
+
+        add_path, remove_path = delta_paths(output_path)
+        with open(add_path, "w") as f:
+            f.writelines(added)
+            # Existing symbols keep their ids, so only new ones need NODE_ID atoms
+            if symbols.next_id > n_known:
+                symbols.write_ids(f, n_known)
+        with open(remove_path, "w") as f:
+            f.writelines(removed)
+            f.writelines(f"(NODE_ID {sym} {i})\n" for sym, i in stale_ids)
+        print(f"Delta: +{len(added)} / -{len(removed)} atoms, -{len(stale_ids)} ids")
+        print(f"  {add_path}")
+        print(f"  {remove_path}")
+    else:
+        print("No previous manifest: wrote a full snapshot.")
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"units": units, "edge_index": edge_index}, f)
+    symbols.save(symbols_path)
+    print("Done!")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default=JSON_PATH, help="Raw IWC JSON dump.")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="Target .metta file.")
+    parser.add_argument(
+        "--symbols", default=SYMBOLS_PATH, help="Sidecar symbol table (JSON)."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-convert workflows whose content hash changed and write add/remove deltas.",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=MANIFEST_PATH,
+        help="Per-workflow hash manifest used by --incremental.",
+    )
+    parser.add_argument(
+        "--edge-index",
+        action="store_true",
+        help="Also write (E src tgt pred) / (R tgt src pred) atoms so the queries find a node's neighbors with one prefix match per direction.",
+    )
+    parser.add_argument(
+        "--max-rss",
+        action="store_true",
+        help="Report the peak resident memory of the conversion.",
+    )
+    args = parser.parse_args()
+
+    if args.incremental:
+        process_incremental(
+            args.input, args.output, args.symbols, args.manifest, args.edge_index
+        )
+    else:
+        process_workflow_data(args.input, args.output, args.symbols, args.edge_index)
+
+    if args.max_rss:
+        size_mb = os.path.getsize(args.input) / (1024 * 1024)
+        print(f"Peak RSS: {max_rss_mb():.1f} MB (input {size_mb:.2f} MB)")
+
+
 if __name__ == "__main__":
-    process_workflow_data()
+    main()
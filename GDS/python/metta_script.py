@@ -0,0 +1,89 @@
+def iter_metta_forms(lines):
+    """
+    Yields every top-level form of MeTTa source text, with a leading `!` kept.
+    Forms are found by balancing parentheses, skipping strings and `;` comments.
+    A line that holds a whole form on its own (no strings or comments, as
+    json_to_metta.py writes one atom per line) is yielded without the
+    character scan; a line with several balanced forms is yielded as one.
+    """
+    form = []
+    depth = 0
+    in_string = False
+    escaped = False
+    for line in lines:
+        if not form:
+            atom = line.strip()
+            if (
+                atom[:1] == "("
+                and atom[-1:] == ")"
+                and '"' not in atom
+                and ";" not in atom
+                and atom.count("(") == atom.count(")")
+            ):
+                yield atom
+                continue
+        for ch in line:
+            if in_string:
+                form.append(ch)
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+                continue
+            if ch == ";":
+                if depth > 0:
+                    form.append("\n")
+                break
+            if depth == 0 and ch != "(":
+                if ch == "!":
+                    form = ["!"]
+                continue
+            if ch == '"':
+                in_string = True
+            elif ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+            form.append(ch)
+            if depth == 0:
+                yield "".join(form)
+                form = []
+
+
+def split_metta_script(filepath, overrides=None):
+    """
+    Splits a MeTTa script into (definitions, directives): definitions is the
+    text of every non-`!` form, directives the list of `!` forms in file order.
+    `overrides` maps a form (directive or definition) to the one used in its place.
+    """
+    definitions = []
+    directives = []
+    overrides = overrides or {}
+    with open(filepath, "r", encoding="utf-8") as f:
+        for form in iter_metta_forms(f):
+            form = overrides.get(form, form)
+            if form.startswith("!"):
+                directives.append(form)
+            else:
+                definitions.append(form)
+    return "\n".join(definitions), directives
+
+
+def label_directives(directives):
+    """
+    Names each directive for reports. A status echo such as
+    !("Checking Hubs (Threshold >= 3):") names the query that follows it;
+    other queries are named by their first line.
+    """
+    named = []
+    label = None
+    for directive in directives:
+        if directive.startswith('!("'):
+            label = directive[3:-2]
+            named.append((f"echo: {label}", directive))
+            continue
+        named.append((label or directive.splitlines()[0][:60], directive))
+        label = None
+    return named
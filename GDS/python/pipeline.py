@@ -0,0 +1,517 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+
+import dag_analytics
+import engines
+import json_to_metta
+import run_gds
+from csr_graph import CSRGraph, estimate_clustering
+from json_to_metta import JSON_PATH, OUTPUT_PATH, SYMBOLS_PATH, load_symbol_table
+from metta_script import split_metta_script
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+METTA_DIR = os.path.join(BASE_DIR, "../metta")
+SCHEMA_PATH = os.path.join(METTA_DIR, "galaxy_schema.metta")
+QUERIES_PATH = os.path.join(METTA_DIR, "galaxy_queries.metta")
+CACHE_DIR = os.path.join(BASE_DIR, "../.stage_cache")
+
+# The src/ analyses (--src): converter.py, the src/metta scripts and final_report.py
+SRC_DIR = os.path.abspath(os.path.join(BASE_DIR, "../../src"))
+SRC_METTA = {
+    name: os.path.join(SRC_DIR, "metta", f"{name}.metta")
+    for name in ("types", "utils", "topology", "algo")
+}
+FINAL_REPORT_PATH = os.path.join(SRC_DIR, "python", "final_report.py")
+sys.path.append(os.path.join(SRC_DIR, "python"))
+
+import co_usage
+import converter
+
+# Stage DAG: convert -> queries -> report (the csr engine goes convert -> report);
+# with --dag also convert -> dag -> report; with --src also kb -> topology and
+# kb -> communities
+STAGES = ("convert", "dag", "queries", "report", "kb", "topology", "communities")
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class StageCache:
+    """
+    Content-addressed stage artifacts: <root>/<stage>/<key>/ holds the outputs of
+    one run plus a manifest.json, where key is the sha256 of the stage name, its
+    parameters and the content of every input file. A directory only becomes
+    visible under its key once the stage finished, so a failed run leaves no entry.
+    """
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = os.path.abspath(root)
+
+    def key(self, stage, inputs, params):
+        digests = {name: file_sha256(path) for name, path in sorted(inputs.items())}
+        payload = {"stage": stage, "params": params, "inputs": digests}
+        blob = json.dumps(payload, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest(), digests
+
+    def run(self, stage, inputs, params, outputs, fn, force=False):
+        """
+        Returns ({output name: cached path}, status, seconds, key). Runs
+        fn(out_dir) only if there is no entry for the current inputs, or when forced.
+        """
+        key, digests = self.key(stage, inputs, params)
+        final = os.path.join(self.root, stage, key)
+        hit = os.path.exists(os.path.join(final, "manifest.json"))
+        paths = {name: os.path.join(final, name) for name in outputs}
+        if hit and not force:
+            return paths, "cached", 0.0, key
+
+        tmp = f"{final}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        t0 = time.time()
+        try:
+            fn(tmp)
+            missing = [n for n in outputs if not os.path.exists(os.path.join(tmp, n))]
+            if missing:
+                raise RuntimeError(f"Stage {stage} did not write {', '.join(missing)}")
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        seconds = time.time() - t0
+
+        manifest = {
+            "stage": stage,
+            "key": key,
+            "params": params,
+            "inputs": {n: {"path": inputs[n], "sha256": d} for n, d in digests.items()},
+            "outputs": {n: file_sha256(os.path.join(tmp, n)) for n in outputs},
+            "seconds": seconds,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        return paths, "forced" if hit else "ran", seconds, key
+
+
+def publish(src, dst):
+    """Copies a cached artifact to its working path, unless it is already identical."""
+    if os.path.exists(dst) and file_sha256(dst) == file_sha256(src):
+        return False
+    shutil.copyfile(src, dst)
+    return True
+
+
+def run_queries(out_dir, data_file, overrides, precompute, chunk_size):
+    """queries stage: fresh PeTTa/MORK space, then every query result as JSON lines."""
+    if run_gds.petta is None:
+        raise RuntimeError(
+            f"Could not import 'petta' from {run_gds.petta_path} (or use --engine csr)"
+        )
+    agent = run_gds.petta.PeTTa(verbose=False)
+    run_gds.benchmark_load_time(data_file, chunk_size)
+    agent.load_metta_file(SCHEMA_PATH)
+    if precompute:
+        run_gds.precompute_adjacency(data_file)
+    with open(os.path.join(out_dir, "results.jsonl"), "w", encoding="utf-8") as f:
+        for name, out in run_gds.iter_directives(agent, QUERIES_PATH, overrides):
+            f.writelines(
+                json.dumps({"directive": name, "result": str(r)}) + "\n" for r in out
+            )
+
+
+def load_dag(dag_path):
+    if dag_path is None:
+        return None
+    with open(dag_path, "r") as f:
+        return json.load(f)
+
+
+def run_dag(out_dir, data_file, symbols_path):
+    """dag stage: FEEDS_INTO analytics of every workflow -> dag.json + atoms."""
+    dag = dag_analytics.run_dag_analytics(
+        data_file,
+        os.path.join(out_dir, "galaxy_dag.metta"),
+        load_symbol_table(symbols_path),
+    )
+    with open(os.path.join(out_dir, "dag.json"), "w") as f:
+        json.dump(dag, f)
+
+
+def run_topology(out_dir, kb_file, backend):
+    """topology stage: topology.metta on a fresh engine -> every result as JSON lines."""
+    engine = engines.make_engine(backend)
+    for name in ("types", "utils"):
+        engine.load_file(SRC_METTA[name])
+    engine.load_file(kb_file)
+    definitions, directives = split_metta_script(SRC_METTA["topology"])
+    engine.load_string(definitions)
+    # The imports are the files loaded above
+    directives = [d for d in directives if not d.startswith("!(import!")]
+    with open(os.path.join(out_dir, "topology.jsonl"), "w", encoding="utf-8") as f:
+        for name, out in engine.iter_results(directives):
+            f.writelines(
+                json.dumps({"directive": name, "result": str(r)}) + "\n" for r in out
+            )
+
+
+def run_communities(out_dir, kb_file, backend):
+    """communities stage: final_report.py on the cached knowledge base -> its text."""
+    command = [
+        sys.executable,
+        FINAL_REPORT_PATH,
+        "--backend",
+        backend,
+        "--kb",
+        kb_file,
+        "--co-usage",
+        os.path.join(out_dir, "co_usage.json"),
+    ]
+    with open(os.path.join(out_dir, "final_report.txt"), "w", encoding="utf-8") as f:
+        subprocess.run(command, stdout=f, check=True)
+
+
+def run_report(out_dir, results_path, data_file, symbols_path, args, dag_path=None):
+    """report stage: streams the cached query results into gds_metrics.json."""
+    labels = load_symbol_table(symbols_path)
+    json_path = os.path.join(out_dir, "gds_metrics.json")
+
+    # MeTTa has no uniform sampler over matches; samples come from the CSR adjacency
+    samples = None
+    estimate = None
+    triad_samples = args.triad_samples if args.open_triads == "sample" else 0
+    if triad_samples or args.clustering == "sampled":
+        graph = CSRGraph.from_metta_file(data_file)
+        if triad_samples:
+            samples = run_gds.sample_open_triads(
+                graph, triad_samples, args.seed, labels
+            )
+        if args.clustering == "sampled":
+            estimate = estimate_clustering(
+                graph, args.wedge_samples, args.lcc_samples, random.Random(args.seed)
+            )
+
+    acc = run_gds.GDSAccumulator()
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            acc.add([json.loads(line)["result"]])
+    acc.report(json_path, labels, samples, estimate, args.top_k, load_dag(dag_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cached convert -> queries -> report pipeline."
+    )
+    parser.add_argument("--input", default=JSON_PATH, help="Raw IWC JSON dump.")
+    parser.add_argument(
+        "--output", default="gds_metrics.json", help="Where the report is published."
+    )
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument(
+        "--force",
+        action="append",
+        default=[],
+        choices=STAGES + ("all",),
+        help="Rerun this stage even if its inputs are unchanged (repeatable).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only print which stages are cached (needs the upstream artifacts).",
+    )
+    parser.add_argument("--engine", choices=["metta", "csr"], default="metta")
+    parser.add_argument(
+        "--edge-index",
+        action="store_true",
+        help="Convert with E/R edge index atoms (json_to_metta.py --edge-index).",
+    )
+    parser.add_argument(
+        "--dag",
+        action="store_true",
+        help="Add the workflow DAG analytics stage (run_gds.py --dag).",
+    )
+    parser.add_argument(
+        "--src",
+        action="store_true",
+        help="Add the src/ stages: converter.py, topology.metta and final_report.py.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["petta", "hyperon"],
+        default="petta",
+        help="MeTTa engine of the --src stages (engines.py).",
+    )
+    parser.add_argument("--precompute", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=0)
+    parser.add_argument(
+        "--triangles", choices=sorted(run_gds.TRIANGLE_DIRECTIVES), default="list"
+    )
+    parser.add_argument(
+        "--open-triads", choices=sorted(run_gds.OPEN_TRIAD_DIRECTIVES), default="list"
+    )
+    parser.add_argument("--triad-samples", type=int, default=20)
+    parser.add_argument(
+        "--clustering", choices=sorted(run_gds.LCC_DIRECTIVES), default="exact"
+    )
+    parser.add_argument("--wedge-samples", type=int, default=10000)
+    parser.add_argument("--lcc-samples", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hub-threshold", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=0)
+    args = parser.parse_args()
+
+    force = set(STAGES) if "all" in args.force else set(args.force)
+    cache = StageCache(args.cache_dir)
+    rows = []
+
+    def stage(name, inputs, params, outputs, fn):
+        if args.dry_run:
+            key, _ = cache.key(name, inputs, params)
+            hit = os.path.exists(os.path.join(cache.root, name, key, "manifest.json"))
+            rows.append((name, "cached" if hit else "stale", 0.0, key))
+            if not hit:
+                return None
+            return {n: os.path.join(cache.root, name, key, n) for n in outputs}
+        print(f"\n[Stage] {name}")
+        paths, status, seconds, key = cache.run(
+            name, inputs, params, outputs, fn, name in force
+        )
+        if status == "cached":
+            print(f"  Inputs unchanged, using {key[:12]}")
+        rows.append((name, status, seconds, key))
+        return paths
+
+    # Source files each stage's output depends on, beyond its main module
+    csr_code = os.path.join(BASE_DIR, "csr_graph.py")
+    converter_code = json_to_metta.__file__
+
+    # 1. convert: IWC JSON -> .metta data file + symbol table
+    converted = stage(
+        "convert",
+        {
+            "input": args.input,
+            "code": converter_code,
+            "stream": os.path.join(BASE_DIR, "json_stream.py"),
+            "csr": csr_code,
+        },
+        {"edge_index": args.edge_index},
+        ("data.metta", "symbols.json"),
+        lambda d: json_to_metta.process_workflow_data(
+            args.input,
+            os.path.join(d, "data.metta"),
+            os.path.join(d, "symbols.json"),
+            args.edge_index,
+        ),
+    )
+
+    report = None
+    dag = None
+    if converted:
+        data_file = converted["data.metta"]
+        symbols_file = converted["symbols.json"]
+
+        # 1'. dag: FEEDS_INTO depth, widths, critical paths -> report section
+        if args.dag:
+            dag = stage(
+                "dag",
+                {
+                    "data": data_file,
+                    "symbols": symbols_file,
+                    "code": dag_analytics.__file__,
+                    "csr": csr_code,
+                    "converter": converter_code,
+                },
+                {},
+                ("dag.json", "galaxy_dag.metta"),
+                lambda d: run_dag(d, data_file, symbols_file),
+            )
+        dag_json = dag["dag.json"] if dag else None
+        sampling = args.clustering == "sampled" or args.open_triads == "sample"
+        report_params = {
+            "open_triads": args.open_triads,
+            "triad_samples": args.triad_samples,
+            "clustering": args.clustering,
+            "wedge_samples": args.wedge_samples,
+            "lcc_samples": args.lcc_samples,
+            "seed": args.seed,
+            "hub_threshold": args.hub_threshold,
+            "top_k": args.top_k,
+        }
+        report_code = {
+            "code": run_gds.__file__,
+            "decoder": os.path.join(BASE_DIR, "result_decoder.py"),
+            "csr": csr_code,
+            "converter": converter_code,
+        }
+        if dag_json:
+            report_code["dag"] = dag_json
+
+        if args.engine == "csr":
+            # 2'. report straight from the CSR adjacency (no query stage)
+            report = stage(
+                "report",
+                {"data": data_file, "symbols": symbols_file, **report_code},
+                {"engine": "csr", **report_params},
+                ("gds_metrics.json",),
+                lambda d: run_gds.run_csr_engine(
+                    data_file,
+                    os.path.join(d, "gds_metrics.json"),
+                    load_symbol_table(symbols_file),
+                    args.triad_samples if args.open_triads == "sample" else 0,
+                    args.seed,
+                    args.clustering,
+                    args.wedge_samples,
+                    args.lcc_samples,
+                    args.hub_threshold,
+                    args.top_k,
+                    load_dag(dag_json),
+                ),
+            )
+        else:
+            # 2. queries: ingest + schema + galaxy_queries.metta -> results.jsonl
+            overrides = run_gds.directive_overrides(
+                args.triangles,
+                args.open_triads,
+                args.clustering,
+                args.top_k,
+                args.hub_threshold,
+                edge_index=args.edge_index,
+            )
+            queried = stage(
+                "queries",
+                {
+                    "data": data_file,
+                    "schema": SCHEMA_PATH,
+                    "queries": QUERIES_PATH,
+                    "code": run_gds.__file__,
+                    "csr": csr_code,
+                },
+                {"overrides": overrides, "precompute": args.precompute},
+                ("results.jsonl",),
+                lambda d: run_queries(
+                    d, data_file, overrides, args.precompute, args.chunk_size
+                ),
+            )
+            # 3. report: results.jsonl -> gds_metrics.json
+            if queried:
+                inputs = {
+                    "results": queried["results.jsonl"],
+                    "symbols": symbols_file,
+                    **report_code,
+                }
+                if sampling:
+                    inputs["data"] = data_file
+                report = stage(
+                    "report",
+                    inputs,
+                    {"engine": "metta", **report_params},
+                    ("gds_metrics.json",),
+                    lambda d: run_report(
+                        d,
+                        queried["results.jsonl"],
+                        data_file,
+                        symbols_file,
+                        args,
+                        dag_json,
+                    ),
+                )
+
+    kb = None
+    topology = None
+    communities = None
+    if args.src:
+        # 4. kb: IWC JSON -> src/ knowledge base (used-in atoms)
+        kb = stage(
+            "kb",
+            {
+                "input": args.input,
+                "code": converter.__file__,
+                "stream": os.path.join(BASE_DIR, "json_stream.py"),
+            },
+            {},
+            ("knowledge_base.metta",),
+            lambda d: converter.convert_json_to_metta(
+                args.input, os.path.join(d, "knowledge_base.metta")
+            ),
+        )
+    if kb:
+        kb_file = kb["knowledge_base.metta"]
+        # Code between the scripts and the stage output
+        engine_code = {
+            "engines": engines.__file__,
+            "run_gds": run_gds.__file__,
+            "script": os.path.join(BASE_DIR, "metta_script.py"),
+            "decoder": os.path.join(BASE_DIR, "result_decoder.py"),
+        }
+
+        # 5. topology: types + utils + kb + topology.metta -> topology.jsonl
+        topology = stage(
+            "topology",
+            {
+                "kb": kb_file,
+                "types": SRC_METTA["types"],
+                "utils": SRC_METTA["utils"],
+                "topology": SRC_METTA["topology"],
+                **engine_code,
+            },
+            {"backend": args.backend},
+            ("topology.jsonl",),
+            lambda d: run_topology(d, kb_file, args.backend),
+        )
+
+        # 6. communities: final_report.py (co-usage + algo.metta) -> report text
+        communities = stage(
+            "communities",
+            {
+                "kb": kb_file,
+                "utils": SRC_METTA["utils"],
+                "algo": SRC_METTA["algo"],
+                "code": FINAL_REPORT_PATH,
+                "co_usage": co_usage.__file__,
+                **engine_code,
+            },
+            {"backend": args.backend},
+            ("final_report.txt", "co_usage.json", "co_usage.metta"),
+            lambda d: run_communities(d, kb_file, args.backend),
+        )
+
+    if not args.dry_run:
+        # Working copies for run_gds.sh, final_report and dashboards
+        publish(converted["data.metta"], OUTPUT_PATH)
+        publish(converted["symbols.json"], SYMBOLS_PATH)
+        if dag:
+            publish(dag["galaxy_dag.metta"], dag_analytics.DAG_PATH)
+        if report:
+            publish(report["gds_metrics.json"], args.output)
+            print(f"\n[Success] Report: {os.path.abspath(args.output)}")
+        if kb:
+            publish(kb["knowledge_base.metta"], co_usage.KB_PATH)
+        if communities:
+            publish(communities["co_usage.json"], co_usage.MATRIX_PATH)
+            publish(communities["co_usage.metta"], co_usage.ATOMS_PATH)
+            print(f"[Success] Community report: {communities['final_report.txt']}")
+        if topology:
+            print(f"[Success] Topology results: {topology['topology.jsonl']}")
+
+    print("\n[Pipeline]")
+    print(f"  {'Stage':<11} | {'Status':<7} | {'Sec':>9} | Key")
+    print("  " + "-" * 47)
+    for name, status, seconds, key in rows:
+        print(f"  {name:<11} | {status:<7} | {seconds:>9.2f} | {key[:12]}")
+
+
+if __name__ == "__main__":
+    main()
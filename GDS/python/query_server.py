@@ -0,0 +1,342 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import run_gds
+from metta_script import iter_metta_forms, label_directives, split_metta_script
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+# Named queries over galaxy_queries.metta; {node}, {k}, ... come from the request args
+NAMED_QUERIES = {
+    "degree": "!(degree-report)",
+    "degree-histogram": "!(degree-histogram)",
+    "lcc": "!(lcc-report)",
+    "lcc-histogram": "!(lcc-histogram)",
+    "triangles": run_gds.TRIANGLE_DIRECTIVES["list"],
+    "triangle-totals": run_gds.TRIANGLE_DIRECTIVES["count"],
+    "open-triads": run_gds.OPEN_TRIAD_DIRECTIVES["list"],
+    "open-triad-totals": run_gds.OPEN_TRIAD_DIRECTIVES["count"],
+    "hubs": run_gds.HUB_DIRECTIVE,
+    "top-hubs": "!(top-hubs {k} {threshold})",
+    "node-degree": '!("Degree of" {node} ":" (get-degree {node}))',
+    "node-lcc": '!("LCC of" {node} ":" (get-lcc {node}))',
+    "node-neighbors": "!(neighbors-list {node})",
+}
+
+# Named query arguments must be a single symbol, so they cannot inject code
+SYMBOL_RE = re.compile(r'^[^\s()";!$]+$')
+
+
+def expand_named(name, args):
+    """Returns the directive text of a named query, or raises KeyError/ValueError."""
+    template = NAMED_QUERIES[name]
+    args = args or {}
+    for key, value in args.items():
+        if not SYMBOL_RE.match(str(value)):
+            raise ValueError(f"Argument {key}={value!r} is not a symbol")
+    return template.format(**args)
+
+
+def split_query(text):
+    """Splits query text into (definitions, directives) like split_metta_script."""
+    forms = list(iter_metta_forms(text.splitlines(True)))
+    definitions = [f for f in forms if not f.startswith("!")]
+    directives = [f for f in forms if f.startswith("!")]
+    return "\n".join(definitions), directives
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health          status of the warm space
+    GET  /named           names of the named queries
+    POST /query           {"query": "<MeTTa>"} or {"name": "...", "args": {...}}
+    POST /delta           applies the json_to_metta --incremental delta files
+    Query results are streamed as JSON lines, one per result, as each directive
+    finishes, followed by a {"done": ...} line; a failed query streams an
+    {"error": ...} line and ends with {"done": false, ...}.
+    """
+
+    # HTTP/1.0: the response ends when the connection closes, so it can stream
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, fmt, *args):
+        print(f"  [{self.address_string()}] {fmt % args}")
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        state = self.server.state
+        if self.path == "/health":
+            self.send_json(
+                200,
+                {
+                    "status": "ok",
+                    "data_file": state["data_file"],
+                    "uptime_sec": time.time() - state["started"],
+                    "queries_served": state["queries_served"],
+                    "queries_failed": state["queries_failed"],
+                    "load_sec": state["load_sec"],
+                },
+            )
+        elif self.path == "/named":
+            self.send_json(200, {"named": sorted(NAMED_QUERIES)})
+        else:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path == "/query":
+            self.handle_query()
+        elif self.path == "/delta":
+            self.handle_delta()
+        else:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def handle_query(self):
+        state = self.server.state
+        try:
+            request = self.read_json()
+            if "name" in request:
+                text = expand_named(request["name"], request.get("args"))
+            else:
+                text = request["query"]
+        except KeyError as e:
+            state["queries_failed"] += 1
+            self.send_json(400, {"error": f"Unknown query or missing field: {e}"})
+            return
+        except ValueError as e:
+            state["queries_failed"] += 1
+            self.send_json(400, {"error": str(e)})
+            return
+
+        definitions, directives = split_query(text)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+
+        agent = state["agent"]
+        t0 = time.time()
+        count = 0
+        try:
+            if definitions:
+                agent.process_metta_string(definitions)
+            for name, directive in label_directives(directives):
+                results = agent.process_metta_string(directive) or []
+                lines = [
+                    json.dumps({"directive": name, "result": str(r)}) + "\n"
+                    for r in results
+                ]
+                self.wfile.write("".join(lines).encode("utf-8"))
+                self.wfile.flush()
+                count += len(results)
+        except Exception as e:
+            # Headers are already sent, so the error goes in the stream
+            state["queries_failed"] += 1
+            self.wfile.write((json.dumps({"error": str(e)}) + "\n").encode("utf-8"))
+            ok = False
+        else:
+            state["queries_served"] += 1
+            ok = True
+        done = {"done": ok, "results": count, "seconds": time.time() - t0}
+        self.wfile.write((json.dumps(done) + "\n").encode("utf-8"))
+
+    def handle_delta(self):
+        state = self.server.state
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            applied = run_gds.apply_delta(state["agent"], state["data_file"])
+        payload = {"applied": applied, "log": log.getvalue()}
+        if applied and state["precompute"]:
+            payload["warning"] = "Stored (Neighbors ...) atoms predate the delta"
+        self.send_json(200 if applied else 409, payload)
+
+
+class QueryClient:
+    """Thin client for a running query_server.py."""
+
+    def __init__(self, url=DEFAULT_URL, timeout=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, path, payload):
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def stream(self, query=None, name=None, args=None):
+        """Yields the response lines of one query as dicts, as they arrive."""
+        payload = {"name": name, "args": args} if name else {"query": query}
+        with self._post("/query", payload) as response:
+            for line in response:
+                yield json.loads(line)
+
+    def results(self, query=None, name=None, args=None):
+        """Yields the result strings of one query; a server-side error is raised."""
+        for line in self.stream(query, name, args):
+            if "result" in line:
+                yield line["result"]
+            elif "error" in line:
+                raise RuntimeError(f"Query server: {line['error']}")
+
+    def iter_directives(self, directives):
+        """
+        Runs directives on the warm space, one request each, in order, and
+        yields (name, results) per directive like run_gds.iter_directives.
+        """
+        for name, directive in label_directives(directives):
+            yield name, list(self.results(directive))
+
+    def apply_delta(self):
+        try:
+            with self._post("/delta", {}) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return json.loads(e.read())
+
+    def health(self):
+        with urllib.request.urlopen(self.url + "/health", timeout=self.timeout) as r:
+            return json.loads(r.read())
+
+
+def serve(args):
+    if run_gds.petta is None:
+        print(f"Error: Could not import 'petta' from {run_gds.petta_path}")
+        sys.exit(1)
+
+    print("Initializing PeTTa Environment...")
+    t0 = time.time()
+    agent = run_gds.petta.PeTTa(verbose=False)
+    run_gds.benchmark_load_time(args.data, args.chunk_size)
+    agent.load_metta_file(args.schema)
+    if args.precompute:
+        run_gds.precompute_adjacency(args.data)
+    overrides = run_gds.directive_overrides(
+        edge_index=run_gds.has_edge_index(args.data)
+    )
+    definitions, _ = split_metta_script(args.queries, overrides)
+    agent.process_metta_string(definitions)
+    for path in args.load:
+        print(f"Loading: {path}")
+        agent.load_metta_file(path)
+    load_sec = time.time() - t0
+
+    server = HTTPServer((args.host, args.port), QueryHandler)
+    server.state = {
+        "agent": agent,
+        "data_file": args.data,
+        "precompute": args.precompute,
+        "started": time.time(),
+        "load_sec": load_sec,
+        "queries_served": 0,
+        "queries_failed": 0,
+    }
+    print(f"\n[Ready] Space loaded in {load_sec:.2f} sec")
+    print(f"  Serving on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping.")
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Warm PeTTa/MORK query server, or a client for one."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="Load the space once and serve queries.")
+    p_serve.add_argument(
+        "--data",
+        default=os.path.join(run_gds.current_dir, "../metta/galaxy_data_full.metta"),
+    )
+    p_serve.add_argument(
+        "--schema",
+        default=os.path.join(run_gds.current_dir, "../metta/galaxy_schema.metta"),
+    )
+    p_serve.add_argument(
+        "--queries",
+        default=os.path.join(run_gds.current_dir, "../metta/galaxy_queries.metta"),
+        help="Script whose definitions are loaded; its directives are not run.",
+    )
+    p_serve.add_argument(
+        "--load",
+        action="append",
+        default=[],
+        help="Extra .metta file to load after the queries (repeatable).",
+    )
+    p_serve.add_argument("--precompute", action="store_true")
+    p_serve.add_argument("--chunk-size", type=int, default=0)
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+
+    p_query = sub.add_parser("query", help="Send one query and print the results.")
+    p_query.add_argument("text", nargs="?", help="MeTTa text, e.g. '!(find-hubs 5)'.")
+    p_query.add_argument("--name", choices=sorted(NAMED_QUERIES))
+    p_query.add_argument("--node", help="Node symbol for node-* named queries.")
+    p_query.add_argument(
+        "--arg",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Other named query arguments, e.g. --arg k=20 --arg threshold=3.",
+    )
+    p_query.add_argument("--url", default=DEFAULT_URL)
+
+    p_delta = sub.add_parser("delta", help="Apply the pending delta files.")
+    p_delta.add_argument("--url", default=DEFAULT_URL)
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args)
+    elif args.command == "query":
+        if not args.text and not args.name:
+            parser.error("query needs MeTTa text or --name")
+        client = QueryClient(args.url)
+        named_args = dict(a.split("=", 1) for a in args.arg)
+        if args.node:
+            named_args["node"] = args.node
+        try:
+            for line in client.stream(args.text, args.name, named_args):
+                if "result" in line:
+                    print(f"  > {line['result']}")
+                elif "error" in line:
+                    print(f"Error: {line['error']}", file=sys.stderr)
+                    sys.exit(1)
+                elif "done" in line:
+                    print(f"  {line['results']} results in {line['seconds']:.4f} sec")
+        except urllib.error.HTTPError as e:
+            print(f"Error: {json.loads(e.read()).get('error', e)}", file=sys.stderr)
+            sys.exit(1)
+    elif args.command == "delta":
+        response = QueryClient(args.url).apply_delta()
+        print(response.get("log", ""))
+        if response.get("warning"):
+            print(f"Warning: {response['warning']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+import argparse
+import re
+import time
+
+# One token per match: string literal, paren, or bare symbol/number
+TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[()]|[^\s()"]+')
+
+
+def _flat_fields(text):
+    """
+    Fields of a flat expression string such as ("Degree of" X ":" 3): split on
+    quotes, then on whitespace, without the tokenizer. Returns None for anything
+    nested, escaped or not in parentheses.
+    """
+    if text[-1:] != ")" or text[:1] != "(" or text.count("(") != 1 or "\\" in text:
+        return None
+    body = text[1:-1]
+    if '"' not in body:
+        return body.split()
+    parts = body.split('"')
+    fields = []
+    for i in range(0, len(parts) - 1, 2):
+        fields += parts[i].split()
+        fields.append(parts[i + 1])
+    fields += parts[-1].split()
+    return fields
+
+
+def parse_sexpr(text):
+    """
+    Parses one S-expression string into nested tuples in a single pass.
+    String literals lose their quotes; every other token stays a str, so numbers
+    are only converted by the decoder that needs them.
+    """
+    text = text.strip()
+    fields = _flat_fields(text)
+    if fields is not None:
+        # Flat expression (the common case)
+        return tuple(fields)
+
+    if '"' in text:
+        tokens = TOKEN_RE.findall(text)
+    else:
+        # No string literals: parentheses and whitespace are the only delimiters
+        tokens = text.replace("(", " ( ").replace(")", " ) ").split()
+    stack = [[]]
+    for tok in tokens:
+        if tok == "(":
+            stack.append([])
+        elif tok == ")":
+            if len(stack) == 1:
+                break
+            expr = tuple(stack.pop())
+            stack[-1].append(expr)
+        elif tok[0] == '"':
+            stack[-1].append(tok[1:-1].replace('\\"', '"'))
+        else:
+            stack[-1].append(tok)
+    while len(stack) > 1:
+        expr = tuple(stack.pop())
+        stack[-1].append(expr)
+    top = stack[0]
+    return top[0] if len(top) == 1 else tuple(top)
+
+
+def to_python(atom):
+    """
+    Converts a hyperon atom into nested tuples of plain values by walking its
+    structure (expression/symbol/grounded, by duck typing). Lists, tuples and
+    strings from PeTTa are returned as they are.
+    """
+    if isinstance(atom, (int, float, str, list, tuple)):
+        return atom
+    if hasattr(atom, "get_children"):
+        return tuple(to_python(a) for a in atom.get_children())
+    if hasattr(atom, "get_object"):
+        obj = atom.get_object()
+        return getattr(obj, "value", obj)
+    if hasattr(atom, "get_name"):
+        return atom.get_name()
+    return parse_sexpr(str(atom))
+
+
+def _seq(x):
+    return tuple(x) if isinstance(x, (list, tuple)) else (x,)
+
+
+def _degree(expr):
+    # ("Degree of" X ":" N)
+    return ("degree", expr[1], int(expr[3]))
+
+
+def _lcc(expr):
+    # ("LCC of" X ":" V)
+    return ("lcc", expr[1], float(expr[3]))
+
+
+def _degree_bin(expr):
+    # (DegreeBin k count)
+    return ("degree_bin", int(float(expr[1])), int(float(expr[2])))
+
+
+def _lcc_stats(expr):
+    # (LCCStats n sum sum-of-squares min max ((bin count) ...))
+    n, total, squares, lo, hi = (float(x) for x in expr[1:6])
+    bins = tuple((int(float(i)), int(float(c))) for i, c in _seq(expr[6]))
+    return ("lcc_stats", int(n), total, squares, lo, hi, bins)
+
+
+def _triangle(expr):
+    # (Triangle a b c)
+    return ("triangle", expr[1], expr[2], expr[3])
+
+
+def _node_triangles(expr):
+    # ("Triangles of" X ":" N)
+    return ("node_triangles", expr[1], int(expr[3]))
+
+
+def _node_open_triads(expr):
+    # ("Open triads of" X ":" N); N may come back as a float from (/ ... 2)
+    return ("node_open_triads", expr[1], int(float(expr[3])))
+
+
+def _open_triad(expr):
+    # (OpenTriad a "->" b "->" c)
+    return ("open_triad", expr[1], expr[3], expr[5])
+
+
+def _hub(expr):
+    # (Hub X (Degree N))
+    return ("hub", expr[1], int(expr[2][1]))
+
+
+def _influence(expr):
+    # (Influence tool (neighbor ...))
+    return ("influence", expr[1], _seq(expr[2]))
+
+
+def _member(expr):
+    # (Member tool label)
+    return ("member", expr[1], int(expr[2]))
+
+
+def _label_propagation(expr):
+    # (LabelPropagation rounds converged)
+    return ("label_propagation", int(expr[1]), str(expr[2]) in ("True", "true"))
+
+
+def _error(expr):
+    return ("error",) + tuple(expr[1:])
+
+
+# Head symbol -> (arity, decoder). Arity is the expected expression length.
+DECODERS = {
+    "Degree of": (4, _degree),
+    "LCC of": (4, _lcc),
+    "DegreeBin": (3, _degree_bin),
+    "LCCStats": (7, _lcc_stats),
+    "Triangle": (4, _triangle),
+    "Triangles of": (4, _node_triangles),
+    "OpenTriad": (6, _open_triad),
+    "Open triads of": (4, _node_open_triads),
+    "Hub": (3, _hub),
+    "Influence": (3, _influence),
+    "Member": (3, _member),
+    "LabelPropagation": (3, _label_propagation),
+    "Error": (None, _error),
+}
+
+
+def decode(atom):
+    """
+    Decodes one result into a typed tuple keyed on its head symbol, e.g.
+    ("Degree of" X ":" N) -> ("degree", X, N). Returns None for anything else
+    (status strings, unknown heads, malformed shapes).
+    """
+    if isinstance(atom, str):
+        if atom[:1] != "(":
+            return None
+        # Fast path for PeTTa/MORK result strings: cut out the head and dispatch
+        # on it before splitting anything. The fields after a known head are split
+        # on whitespace; quoted ones keep their quotes, which the fixed-arity
+        # decoders never read, and one nested list may close the expression, as
+        # in (Hub X (Degree 3)). Other shapes go through parse_sexpr.
+        if atom[1:2] == '"':
+            end = atom.find('"', 2)
+            head = atom[2:end]
+        else:
+            end = atom.find(" ")
+            head = atom[1:end]
+        plain = end > 0 and atom[-1] == ")" and "\\" not in atom
+        entry = DECODERS.get(head)
+        if entry is None:
+            if plain and head.isprintable():
+                return None
+        elif plain and entry[0]:
+            rest = atom[end + 1 : -1]
+            if "(" not in rest:
+                fields = rest.split()
+            elif rest.count("(") == 1 and rest.count(")") == 1 and rest[-1] == ")":
+                i = rest.find("(")
+                fields = rest[:i].split()
+                fields.append(tuple(rest[i + 1 : -1].split()))
+            else:
+                fields = None
+            if fields is not None and len(fields) + 1 == entry[0]:
+                fields.insert(0, head)
+                try:
+                    return entry[1](fields)
+                except (IndexError, TypeError, ValueError):
+                    pass
+        expr = parse_sexpr(atom)
+    elif isinstance(atom, (list, tuple)):
+        expr = atom
+    else:
+        expr = to_python(atom)
+
+    if not isinstance(expr, (list, tuple)) or not expr:
+        return None
+    entry = DECODERS.get(expr[0])
+    if entry is None:
+        return None
+    arity, fn = entry
+    if arity is not None and len(expr) != arity:
+        return None
+    try:
+        return fn(expr)
+    except (IndexError, TypeError, ValueError):
+        return None
+
+
+def iter_decoded(results):
+    """Yields decoded tuples for the results that match a known shape."""
+    for r in results:
+        d = decode(r)
+        if d is not None:
+            yield d
+
+
+def _canonical_token(x):
+    if isinstance(x, (list, tuple)):
+        return "(" + " ".join(_canonical_token(a) for a in x) + ")"
+    if isinstance(x, bool):
+        return str(x)
+    try:
+        v = float(x)
+    except (TypeError, ValueError):
+        return _to_sexpr(x)
+    return str(int(v)) if v.is_integer() else f"{v:.12g}"
+
+
+def canonical(result):
+    """
+    Backend-independent text of one result, for comparing engines: hyperon
+    atoms and PeTTa strings of the same expression give the same string
+    (numbers as 3 / 0.5 whether they came back as int, float or text).
+    """
+    if isinstance(result, str):
+        expr = parse_sexpr(result) if result[:1] in ("(", '"') else result
+    else:
+        expr = to_python(result)
+    return _canonical_token(expr)
+
+
+def _legacy_decode(r):
+    """The previous str() + replace() + split() parsing, kept for the benchmark."""
+    r_str = str(r)
+    if "Degree of" in r_str:
+        cleaned_str = (
+            r_str.replace('"', "")
+            .replace("'", "")
+            .replace("(", "")
+            .replace(")", "")
+            .replace(",", "")
+        )
+        return ("degree", None, int(cleaned_str.split()[-1]))
+    elif "LCC of" in r_str:
+        cleaned_str = (
+            r_str.replace('"', "")
+            .replace("'", "")
+            .replace("(", "")
+            .replace(")", "")
+            .replace(",", "")
+        )
+        return ("lcc", None, float(cleaned_str.split()[-1]))
+    elif "Triangle" in r_str and "Motif:" not in r_str:
+        cleaned = r_str.strip().lstrip("(").lstrip('"')
+        if cleaned.startswith("Triangle"):
+            return ("triangle",)
+    elif "OpenTriad" in r_str and "Motif:" not in r_str:
+        return ("open_triad",)
+    elif "Hub" in r_str:
+        parts = (
+            r_str.replace('"', "")
+            .replace("'", "")
+            .replace("(", "")
+            .replace(")", "")
+            .replace(",", "")
+        ).split()
+        idx = parts.index("Degree")
+        return ("hub", parts[1], int(parts[idx + 1]))
+    return None
+
+
+def _to_sexpr(x):
+    if isinstance(x, tuple):
+        return "(" + " ".join(_to_sexpr(a) for a in x) + ")"
+    if isinstance(x, str) and not re.fullmatch(r"[^\s()\"]+", x):
+        return f'"{x}"'
+    return str(x)
+
+
+def _synthetic_results(n):
+    """Mixed result set shaped like galaxy_queries.metta output, as strings and tuples."""
+    strings = []
+    tuples = []
+    for i in range(n):
+        node = f"Tool_Hub_{i:06d}_abcdef12"
+        kind = i % 5
+        if kind == 0:
+            t = ("Degree of", node, ":", i % 97)
+        elif kind == 1:
+            t = ("LCC of", node, ":", (i % 13) / 13)
+        elif kind == 2:
+            t = ("Triangle", node, f"b{i}", f"c{i}")
+        elif kind == 3:
+            t = ("OpenTriad", node, "->", f"b{i}", "->", f"c{i}")
+        else:
+            t = ("Hub", node, ("Degree", i % 97))
+        tuples.append(t)
+        strings.append(_to_sexpr(t))
+    return strings, tuples
+
+
+def benchmark(n):
+    """Times the legacy string path against typed decoding on n synthetic atoms."""
+    strings, tuples = _synthetic_results(n)
+    print(f"[Decode Benchmark] {n} result atoms")
+    print(f"  {'Path':<28} | {'Sec':>8} | {'Atoms/s':>12}")
+    print("  " + "-" * 54)
+    for label, fn, data in (
+        ("legacy str() on tuples", _legacy_decode, tuples),
+        ("typed decode on tuples", decode, tuples),
+        ("legacy str() on strings", _legacy_decode, strings),
+        ("typed decode on strings", decode, strings),
+    ):
+        t0 = time.perf_counter()
+        for r in data:
+            fn(r)
+        dt = time.perf_counter() - t0
+        print(f"  {label:<28} | {dt:>8.4f} | {n / dt:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--bench",
+        type=int,
+        default=200000,
+        help="Number of synthetic result atoms for the decode micro-benchmark.",
+    )
+    args = parser.parse_args()
+    benchmark(args.bench)
+
+
+if __name__ == "__main__":
+    main()
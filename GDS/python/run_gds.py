@@ -1,9 +1,16 @@
 import sys
 import os
+import io
 import time
 import json
 import argparse
+import contextlib
+import heapq
+import multiprocessing
+import random
 import statistics
+import threading
+import queue
 from collections import Counter
 
 # Ensure PeTTa libraries are importable
@@ -15,14 +22,222 @@ if petta_path not in sys.path:
 try:
     import petta
 except ImportError:
-    print(f"Error: Could not import 'petta' from {petta_path}")
-    sys.exit(1)
+    # Only the MeTTa engine needs PeTTa; the CSR engine is pure Python
+    petta = None
 
+from csr_graph import (
+    CSRGraph,
+    compute_gds_metrics,
+    estimate_clustering,
+    estimate_gds_metrics,
+    hub_cutoff,
+)
+from dag_analytics import DAG_PATH, run_dag_analytics
+from json_stream import max_rss_mb, rss_mb
+from json_to_metta import (
+    EDGE_INDEX_MARKER,
+    SYMBOLS_PATH,
+    delta_paths,
+    load_symbol_table,
+)
+from metta_script import iter_metta_forms, label_directives, split_metta_script
+from result_decoder import iter_decoded
 
-def benchmark_load_time(data_file_path):
+# Triangle directive in galaxy_queries.metta for each --triangles mode
+TRIANGLE_DIRECTIVES = {
+    "list": "!(ordered-triangle)",
+    "count": "!(triangle-totals)",
+}
+
+# LCC directive for each --clustering mode; 'sampled' estimates LCC from the CSR adjacency
+LCC_DIRECTIVES = {
+    "exact": "!(lcc-histogram)",
+    "sampled": '!("LCC: estimated by wedge sampling")',
+}
+
+# Open-triad directive for each --open-triads mode ('sample' adds CSR examples)
+OPEN_TRIAD_DIRECTIVES = {
+    "list": "!(ordered-open-triad)",
+    "count": "!(open-triad-totals)",
+    "sample": "!(open-triad-totals)",
+}
+
+
+# Degree and LCC come back as in-engine histograms; --report detailed swaps in
+# the per-node directives
+PER_NODE_DIRECTIVES = {
+    "!(degree-histogram)": "!(degree-report)",
+    "!(lcc-histogram)": "!(lcc-report)",
+}
+
+# Edge-lookup definitions swapped for the indexed ones when the data file has an
+# edge index (json_to_metta.py --edge-index), so the choice is made once per run
+EDGE_INDEX_DEFINITIONS = {
+    "(= (neighbors-of $node) (predicate-neighbors-of $node))": "(= (neighbors-of $node) (indexed-neighbors-of $node))",
+    "(= (check-connection $x $y) (predicate-connection $x $y))": "(= (check-connection $x $y) (indexed-connection $x $y))",
+}
+
+# Shard filter for --workers, swapped in at definition time in each worker
+SHARD_DEFINITIONS = {
+    "(= (in-shard $node) True)": "(= (in-shard $node) (sharded-in-shard $node))",
+}
+
+# Backends of --compare-backends (engines.BACKENDS)
+BACKEND_NAMES = ("hyperon", "petta", "mork")
+
+# Hub directive and its status echo in galaxy_queries.metta (--top-k / --hub-threshold)
+HUB_DIRECTIVE = "!(find-hubs 3)"
+HUB_ECHO = '!("Checking Hubs (Threshold >= 3):")'
+
+
+def hub_overrides(top_k, threshold):
+    """Directive overrides for a top-k and/or non-default hub threshold."""
+    if top_k > 0:
+        return {
+            HUB_DIRECTIVE: f"!(top-hubs {top_k} {threshold})",
+            HUB_ECHO: f'!("Checking Hubs (Top {top_k}, Threshold >= {threshold}):")',
+        }
+    if threshold != 3:
+        return {
+            HUB_DIRECTIVE: f"!(find-hubs {threshold})",
+            HUB_ECHO: f'!("Checking Hubs (Threshold >= {threshold}):")',
+        }
+    return {}
+
+
+def directive_overrides(
+    triangles="list",
+    open_triads="list",
+    clustering="exact",
+    top_k=0,
+    hub_threshold=3,
+    per_node=False,
+    edge_index=False,
+):
+    """
+    Maps each default directive to the one run in its place for the chosen modes.
+    With `edge_index`, the edge-lookup definitions are swapped as well.
+    """
+    overrides = dict(PER_NODE_DIRECTIVES) if per_node else {}
+    if edge_index:
+        overrides.update(EDGE_INDEX_DEFINITIONS)
+    if triangles != "list":
+        overrides[TRIANGLE_DIRECTIVES["list"]] = TRIANGLE_DIRECTIVES[triangles]
+    if open_triads != "list":
+        overrides[OPEN_TRIAD_DIRECTIVES["list"]] = OPEN_TRIAD_DIRECTIVES[open_triads]
+    if clustering != "exact":
+        overrides[LCC_DIRECTIVES["exact"]] = LCC_DIRECTIVES[clustering]
+    overrides.update(hub_overrides(top_k, hub_threshold))
+    return overrides
+
+
+def has_edge_index(data_file):
+    """True if the data file carries the (EdgeIndex) marker of --edge-index."""
+    with open(data_file, "r", encoding="utf-8") as f:
+        return any(line.strip() == EDGE_INDEX_MARKER for line in f)
+
+
+def mork_add_atoms(content):
+    """
+    Direct FFI call to the MORK Rust backend that parses and adds a block of atoms.
+    """
+    if petta.janus is None:
+        raise RuntimeError("Janus interface not initialized.")
+
+    resp = petta.janus.query_once(
+        "mork('add-atoms', Content, Result)", {"Content": content}
+    )
+    if not resp or "OK" not in str(resp.get("Result")):
+        raise RuntimeError(f"MORK Load Failed: {resp}")
+
+
+def iter_atom_chunks(data_file_path, chunk_size):
+    """
+    Reads a .metta file and yields (text, atom_count) blocks of `chunk_size` atoms.
+    Blocks are cut only at top-level atom boundaries, so each block parses on its own.
+    Atoms are counted per form of iter_metta_forms, i.e. per line for one-atom lines.
+    """
+    forms = []
+    with open(data_file_path, "r", encoding="utf-8") as f:
+        for form in iter_metta_forms(f):
+            forms.append(form)
+            if len(forms) >= chunk_size:
+                yield "\n".join(forms), len(forms)
+                forms = []
+
+    if forms:
+        yield "\n".join(forms), len(forms)
+
+
+def chunked_load(data_file_path, chunk_size):
+    """
+    Pipelined ingest: a reader thread prepares the next chunk while the current
+    one is inside MORK. Reports throughput per chunk and overall.
+    """
+    # Bounded queue: at most one chunk read ahead of the one being ingested
+    chunks = queue.Queue(maxsize=1)
+
+    def reader():
+        try:
+            for chunk in iter_atom_chunks(data_file_path, chunk_size):
+                chunks.put(chunk)
+        except Exception as e:
+            chunks.put(e)
+            return
+        chunks.put(None)
+
+    threading.Thread(target=reader, daemon=True).start()
+
+    print(f"Chunk Size:   {chunk_size} atoms (pipelined)")
+    print(
+        f"  {'Chunk':>5} | {'Atoms':>8} | {'MB':>7} | {'Sec':>8} | {'Atoms/s':>10} | {'MB/s':>7}"
+    )
+    print("  " + "-" * 60)
+
+    total_atoms = 0
+    total_mb = 0.0
+    busy = 0.0
+    t0 = time.time()
+    n = 0
+    while True:
+        item = chunks.get()
+        if item is None:
+            break
+        if isinstance(item, Exception):
+            raise item
+        text, atoms = item
+        size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+
+        t_chunk = time.time()
+        mork_add_atoms(text)
+        dt = time.time() - t_chunk
+
+        n += 1
+        busy += dt
+        total_atoms += atoms
+        total_mb += size_mb
+        rate = atoms / dt if dt > 0 else float("inf")
+        mb_rate = size_mb / dt if dt > 0 else float("inf")
+        print(
+            f"  {n:>5} | {atoms:>8} | {size_mb:>7.3f} | {dt:>8.4f} | {rate:>10.0f} | {mb_rate:>7.2f}"
+        )
+
+    wall = time.time() - t0
+    print("  " + "-" * 60)
+    if wall > 0:
+        print(
+            f"MORK Ingest:  {wall:.4f} sec wall, {busy:.4f} sec in MORK "
+            f"({total_atoms} atoms, {total_atoms / wall:.0f} atoms/s, "
+            f"{total_mb / wall:.2f} MB/s)"
+        )
+    return wall
+
+
+def benchmark_load_time(data_file_path, chunk_size=0):
     """
     Loads the dataset into the MORK runtime via FFI.
     Measures and reports the time taken for file I/O and MORK ingestion.
+    With `chunk_size` > 0 the file is streamed into MORK in atom-aligned chunks.
     """
     if not os.path.exists(data_file_path):
         print(f"Error: Data file not found at {data_file_path}")
@@ -31,6 +246,14 @@ def benchmark_load_time(data_file_path):
     print(f"\n[Benchmark] Target Data: {os.path.basename(data_file_path)}")
     print("-" * 50)
 
+    if chunk_size > 0:
+        try:
+            chunked_load(data_file_path, chunk_size)
+        except Exception as e:
+            print(f"CRITICAL ERROR during MORK load: {e}")
+            sys.exit(1)
+        return
+
     # 1. Read File IO
     t0 = time.time()
     with open(data_file_path, "r", encoding="utf-8") as f:
@@ -43,18 +266,9 @@ def benchmark_load_time(data_file_path):
     print(f"File Read:    {read_duration:.4f} sec ({file_size_mb:.2f} MB)")
 
     # 2. Parse & Load into Space
-    if petta.janus is None:
-        raise RuntimeError("Janus interface not initialized.")
-
     t2 = time.time()
     try:
-        # Direct FFI call to MORK Rust backend
-        resp = petta.janus.query_once(
-            "mork('add-atoms', Content, Result)", {"Content": content}
-        )
-        if not resp or "OK" not in str(resp.get("Result")):
-            raise RuntimeError(f"MORK Load Failed: {resp}")
-
+        mork_add_atoms(content)
     except Exception as e:
         print(f"CRITICAL ERROR during MORK load: {e}")
         sys.exit(1)
@@ -66,134 +280,471 @@ def benchmark_load_time(data_file_path):
     print(f"Total Time:   {t3 - t0:.4f} sec")
 
 
-def process_gds_results(results):
+def read_delta_atoms(path):
+    """Atom lines of a delta file, without blank lines and `;` comments."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()[:1] not in ("", ";")]
+
+
+def apply_delta(agent, data_file_path):
+    """
+    Applies the delta files written by `json_to_metta.py --incremental` to a space
+    that already holds the previous snapshot, instead of re-ingesting everything.
+    Removals go through `remove-atom`, additions through the MORK bulk loader.
+    """
+    add_path, remove_path = delta_paths(data_file_path)
+    if not os.path.exists(add_path) or not os.path.exists(remove_path):
+        print(f"Error: No delta files next to {data_file_path}")
+        return False
+
+    print(f"\n[Delta] Target Data: {os.path.basename(data_file_path)}")
+    print("-" * 50)
+
+    t0 = time.time()
+    removed = read_delta_atoms(remove_path)
+    if removed:
+        agent.process_metta_string(
+            "\n".join(f"!(remove-atom &mork {atom})" for atom in removed)
+        )
+    t1 = time.time()
+    print(f"Removed:      {len(removed)} atoms in {t1 - t0:.4f} sec")
+
+    added = read_delta_atoms(add_path)
+    if added:
+        mork_add_atoms("\n".join(added))
+    t2 = time.time()
+    print(f"Added:        {len(added)} atoms in {t2 - t1:.4f} sec")
+    return True
+
+
+def iter_adjacency_atoms(graph):
+    """
+    Yields a (Neighbors node (n1 n2 ...)) and a (Degree node k) atom per query node.
+    The neighbor lists are the CSR ones, i.e. exactly what `neighbors-list` returns
+    (both drop self loops).
+    """
+    names = graph.names
+    for i in sorted(set(graph.nodes)):
+        nbrs = " ".join(names[j] for j in graph.neighbors(i))
+        yield f"(Neighbors {names[i]} ({nbrs}))"
+        yield f"(Degree {names[i]} {graph.degree(i)})"
+
+
+def precompute_adjacency(data_file_path):
+    """
+    Precompute stage, run once after ingest: materializes every node's neighbor
+    list and degree into &mork, so `neighbors-list` and `get-degree` read one
+    atom instead of matching all edge predicates on every call.
+    Run it again after apply_delta, since the stored lists are not updated.
+    """
+    print(f"\n[Precompute] Adjacency for {os.path.basename(data_file_path)}")
+    print("-" * 50)
+
+    t0 = time.time()
+    graph = CSRGraph.from_metta_file(data_file_path)
+    atoms = list(iter_adjacency_atoms(graph))
+    t1 = time.time()
+    print(f"Built:        {len(atoms)} atoms in {t1 - t0:.4f} sec")
+
+    mork_add_atoms("\n".join(atoms))
+    t2 = time.time()
+    print(f"MORK Ingest:  {t2 - t1:.4f} sec")
+    return len(atoms)
+
+
+def shard_nodes(graph, workers):
+    """
+    Splits the distinct query nodes into `workers` shards of about equal cost.
+    Per-node work (neighbor pairs for LCC and triangles) grows with degree^2,
+    so nodes go heaviest first to the currently lightest shard.
+    """
+    shards = [[] for _ in range(workers)]
+    loads = [(0, w) for w in range(workers)]
+    for i in sorted(set(graph.nodes), key=lambda i: (-graph.degree(i), i)):
+        load, w = heapq.heappop(loads)
+        shards[w].append(graph.names[i])
+        heapq.heappush(loads, (load + graph.degree(i) ** 2 + 1, w))
+    return shards
+
+
+def run_shard(
+    worker,
+    shard,
+    data_file,
+    schema_file,
+    queries_file,
+    overrides,
+    chunk_size,
+    precompute,
+):
+    """
+    Worker process for --workers: loads its own PeTTa/MORK space from the data
+    file, marks its shard with (ShardNode node) atoms and runs the query
+    directives with in-shard swapped by SHARD_DEFINITIONS. Results are returned
+    as strings per directive so they can cross the process boundary.
+    """
+    t0 = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = petta.PeTTa(verbose=False)
+        benchmark_load_time(data_file, chunk_size)
+        agent.load_metta_file(schema_file)
+        if precompute:
+            precompute_adjacency(data_file)
+        mork_add_atoms("\n".join(f"(ShardNode {n})" for n in shard))
+        t1 = time.time()
+
+        definitions, directives = split_metta_script(queries_file, overrides)
+        agent.process_metta_string(definitions)
+        steps = []
+        for name, text in label_directives(directives):
+            out = agent.process_metta_string(text) or []
+            steps.append((name, [str(r) for r in out]))
+    t2 = time.time()
+
+    return {
+        "worker": worker,
+        "nodes": len(shard),
+        "load_sec": t1 - t0,
+        "query_sec": t2 - t1,
+        "peak_rss_mb": max_rss_mb(),
+        "steps": steps,
+    }
+
+
+def run_sharded(
+    queries_file,
+    data_file,
+    schema_file,
+    workers,
+    overrides=None,
+    chunk_size=0,
+    precompute=False,
+):
+    """
+    Runs the query script in `workers` processes, each with its own PeTTa/MORK
+    space and one shard of the nodes (see shard_nodes), and merges the results
+    in directive order. Yields (directive name, results) like iter_directives.
+    Status echoes are kept once; per-node counts are summed by GDSAccumulator.
+    """
+    shards = [s for s in shard_nodes(CSRGraph.from_metta_file(data_file), workers) if s]
+    print(f"  Workers: {len(shards)} processes over {sum(map(len, shards))} nodes")
+
+    jobs = [
+        (
+            w,
+            shard,
+            data_file,
+            schema_file,
+            queries_file,
+            {**(overrides or {}), **SHARD_DEFINITIONS},
+            chunk_size,
+            precompute,
+        )
+        for w, shard in enumerate(shards)
+    ]
+    # spawn, so no worker inherits the parent's Prolog/MORK state
+    with multiprocessing.get_context("spawn").Pool(len(jobs)) as pool:
+        outs = pool.starmap(run_shard, jobs)
+
+    print(
+        f"  {'Worker':<6} | {'Nodes':>6} | {'Load sec':>9} | {'Query sec':>9} | {'Peak MB':>8}"
+    )
+    print("  " + "-" * 50)
+    for out in outs:
+        print(
+            f"  {out['worker']:<6} | {out['nodes']:>6} | {out['load_sec']:>9.2f} | "
+            f"{out['query_sec']:>9.2f} | {out['peak_rss_mb']:>8.1f}"
+        )
+
+    for step, (name, first) in enumerate(outs[0]["steps"]):
+        if name.startswith("echo: "):
+            yield name, first
+        else:
+            yield name, [r for out in outs for r in out["steps"][step][1]]
+
+
+# Fixed-width LCC bins over [0, 1], as in (lcc-bin ...) in galaxy_queries.metta
+LCC_BINS = 20
+
+
+def lcc_bin(v):
+    """Index of the fixed-width bin of an LCC value (1.0 goes to the last bin)."""
+    return min(int(v * LCC_BINS), LCC_BINS - 1)
+
+
+class LCCSummary:
+    """
+    Folded LCC distribution: count, sum, sum of squares, min, max and LCC_BINS
+    fixed-width bin counts. Per-node values, engine folds and --workers shards
+    all merge into one. The per-node values are kept as well until a fold is
+    merged, so the median is exact unless some input was only binned.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self.min = None
+        self.max = None
+        self.bins = Counter()
+        self.values = []
+
+    @classmethod
+    def from_values(cls, values):
+        summary = cls()
+        for v in values:
+            summary.add(v)
+        return summary
+
+    def add(self, v):
+        """Adds one per-node value ("LCC of" atoms, the CSR engine)."""
+        self.fold(1, v, v * v, v, v, ((lcc_bin(v), 1),))
+        if self.values is not None:
+            self.values.append(v)
+
+    def merge(self, n, total, squares, lo, hi, bins):
+        """
+        Adds a folded (LCCStats ...) result: moments and (bin, count) pairs.
+        Its values are only known to their bin, so the median becomes approximate.
+        """
+        if n:
+            self.values = None
+            self.fold(n, total, squares, lo, hi, bins)
+
+    def fold(self, n, total, squares, lo, hi, bins):
+        self.n += n
+        self.total += total
+        self.squares += squares
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+        for i, c in bins:
+            self.bins[i] += c
+
+    def value_at(self, rank):
+        """
+        Value of the 0-based `rank` in sorted order, interpolated inside the bin
+        that holds it (exact to 1 / LCC_BINS) and clamped to the observed range.
+        """
+        below = 0
+        for i in sorted(self.bins):
+            c = self.bins[i]
+            if rank < below + c:
+                v = (i + (rank - below + 0.5) / c) / LCC_BINS
+                return min(max(v, self.min), self.max)
+            below += c
+        return self.max
+
+    def median(self):
+        """Exact median of the per-node values, else the binned estimate."""
+        if self.values is not None:
+            return statistics.median(self.values)
+        return (self.value_at((self.n - 1) // 2) + self.value_at(self.n // 2)) / 2
+
+    def stats(self):
+        """
+        Local clustering section of the report: avg, min, max, p50 (and stdev).
+        When a fold was merged the median is reported as p50_approx, with the
+        bin width it is accurate to.
+        """
+        avg = self.total / self.n
+        local = {"avg": avg, "min": self.min, "max": self.max}
+        if self.values is not None:
+            local["p50"] = self.median()
+        else:
+            local["p50_approx"] = self.median()
+            local["bin_width"] = 1 / LCC_BINS
+        if self.n > 1:
+            var = (self.squares - self.n * avg * avg) / (self.n - 1)
+            local["stdev"] = max(var, 0.0) ** 0.5
+        return local
+
+
+class GDSAccumulator:
+    """
+    Incremental form of process_gds_results: results are added one directive at
+    a time and only folded values are kept (degree counts, LCC moments and bins),
+    so triangle and open-triad listings are not held until the report is built.
+    Per-node LCC values are kept only when the engine returned them ("LCC of"),
+    for the exact median.
+    """
+
+    def __init__(self):
+        self.degree_counts = Counter()
+        self.lcc = LCCSummary()
+        self.hubs = []
+        self.triangle_count = 0
+        self.node_triangle_sum = 0
+        self.opentriad_count = 0
+        self.node_opentriad_sum = 0
+
+    def add(self, results):
+        """Decodes a batch of results (dispatch on the head symbol of each atom)."""
+        for kind, *fields in iter_decoded(results):
+            if kind == "degree":
+                self.degree_counts[fields[1]] += 1
+            elif kind == "degree_bin":
+                self.degree_counts[fields[0]] += fields[1]
+            elif kind == "lcc":
+                self.lcc.add(fields[1])
+            elif kind == "lcc_stats":
+                self.lcc.merge(*fields)
+            elif kind == "triangle":
+                self.triangle_count += 1
+            elif kind == "node_triangles":
+                self.node_triangle_sum += fields[1]
+            elif kind == "open_triad":
+                self.opentriad_count += 1
+            elif kind == "node_open_triads":
+                self.node_opentriad_sum += fields[1]
+            elif kind == "hub":
+                self.hubs.append({"node": str(fields[0]), "degree": fields[1]})
+
+    def report(
+        self,
+        json_path="gds_metrics.json",
+        labels=None,
+        open_triad_samples=None,
+        clustering_estimate=None,
+        top_k=0,
+        dag=None,
+    ):
+        """
+        Builds and exports the report from everything added so far.
+        `clustering_estimate` is a (raw_lcc, estimate) pair from estimate_clustering
+        that stands in for the "LCC of" atoms.
+        """
+        print("\n[Processing GDS Report]...")
+
+        # Count-only mode: per-node totals, 3 corners per triangle (also across shards)
+        triangle_count = self.triangle_count
+        if self.node_triangle_sum:
+            triangle_count = self.node_triangle_sum // 3
+        # Every open triad has a single centre, so per-node counts add up directly
+        opentriad_count = self.opentriad_count
+        if self.node_opentriad_sum:
+            opentriad_count = self.node_opentriad_sum
+
+        lcc = self.lcc
+        estimate = None
+        if clustering_estimate is not None:
+            raw_lcc, estimate = clustering_estimate
+            lcc = LCCSummary.from_values(raw_lcc)
+
+        return build_gds_report(
+            self.degree_counts,
+            lcc,
+            triangle_count,
+            opentriad_count,
+            self.hubs,
+            json_path,
+            labels,
+            open_triad_samples,
+            estimate,
+            top_k,
+            dag,
+        )
+
+
+def process_gds_results(
+    results,
+    json_path="gds_metrics.json",
+    labels=None,
+    open_triad_samples=None,
+    clustering_estimate=None,
+    top_k=0,
+    dag=None,
+):
     """
     Parses complex GDS query results to generate a comprehensive JSON report.
+    `clustering_estimate` is a (raw_lcc, estimate) pair from estimate_clustering
+    that stands in for the "LCC of" atoms.
     """
-    print("\n[Processing GDS Report]...")
-
-    # Storage for raw values
-    raw_degrees = []
-    raw_lcc = []
-    hubs = []
-    triangle_count = 0
-    opentriad_count = 0
-
-    # 1. Parse Results
-    for r in results:
-        r_str = str(r)
-
-        # --- Degree Parsing ---
-        if "Degree of" in r_str:
-            try:
-                # Clean up formatting
-                cleaned_str = (
-                    r_str.replace('"', "")
-                    .replace("'", "")
-                    .replace("(", "")
-                    .replace(")", "")
-                    .replace(",", "")
-                )
-                parts = cleaned_str.split()
-                if len(parts) >= 1:
-                    val = parts[-1]
-                    raw_degrees.append(int(val))
-            except (ValueError, TypeError):
-                pass
-
-        # --- Clustering Coefficient (LCC) Parsing ---
-        elif "LCC of" in r_str:
-            try:
-                cleaned_str = (
-                    r_str.replace('"', "")
-                    .replace("'", "")
-                    .replace("(", "")
-                    .replace(")", "")
-                    .replace(",", "")
-                )
-                parts = cleaned_str.split()
-                if len(parts) >= 1:
-                    val = parts[-1]
-                    raw_lcc.append(float(val))
-            except (ValueError, TypeError):
-                pass
-
-        # --- Motifs: Triangles ---
-        # Look for atom structure (Triangle A B C)
-        elif "Triangle" in r_str and "Motif:" not in r_str:
-            cleaned = r_str.strip().lstrip("(").lstrip('"')
-            if cleaned.startswith("Triangle"):
-                triangle_count += 1
-
-        # --- Motifs: Open Triads ---
-        elif "OpenTriad" in r_str and "Motif:" not in r_str:
-            opentriad_count += 1
-
-        # --- Hubs ---
-        elif "Hub" in r_str:
-            try:
-                cleaned_str = (
-                    r_str.replace('"', "")
-                    .replace("'", "")
-                    .replace("(", "")
-                    .replace(")", "")
-                    .replace(",", "")
-                )
-                parts = cleaned_str.split()
+    acc = GDSAccumulator()
+    acc.add(results)
+    return acc.report(
+        json_path, labels, open_triad_samples, clustering_estimate, top_k, dag
+    )
+
+
+def build_gds_report(
+    degree_counts,
+    lcc,
+    triangle_count,
+    opentriad_count,
+    hubs,
+    json_path="gds_metrics.json",
+    labels=None,
+    open_triad_samples=None,
+    clustering_estimate=None,
+    top_k=0,
+    dag=None,
+):
+    """
+    Aggregates folded per-node values into the GDS metrics structure and exports it:
+    `degree_counts` maps degree -> nodes, `lcc` is an LCCSummary.
+    Shared by the MeTTa result parser and the CSR engine so both write the same JSON.
+    `labels` (symbol table from json_to_metta) adds readable names to the hubs.
+    `open_triad_samples` (from sample_open_triads) is stored under the motifs.
+    `clustering_estimate` (from estimate_clustering) replaces the exact global
+    clustering and is stored with its confidence intervals.
+    With `top_k`, hubs are cut to the k highest degrees (ties kept), which merges
+    the per-shard top-k lists of --workers into the global one.
+    `dag` (from dag_analytics.run_dag_analytics) is stored as the workflow DAG section.
+    """
+    if top_k > 0:
+        degrees = {hub["node"]: hub["degree"] for hub in hubs}
+        cutoff = hub_cutoff(degrees.values(), top_k, 0)
+        hubs = [hub for hub in hubs if hub["degree"] >= cutoff]
 
-                # Look for 'Degree' keyword
-                if "Degree" in parts:
-                    idx = parts.index("Degree")
-                    if idx + 1 < len(parts):
-                        degree_val = int(parts[idx + 1])
-                        node_name = parts[1] if len(parts) > 1 else "unknown"
-                        hubs.append({"node": node_name, "degree": degree_val})
-            except Exception:
-                pass
+    if labels:
+        for hub in hubs:
+            entry = labels.get(hub["node"])
+            if entry:
+                hub["label"] = entry["label"]
 
-    # 2. Build JSON Structure
+    # 1. Build JSON Structure
 
     # -- Degree Section --
     degree_data = {}
-    if raw_degrees:
-        counts = Counter(raw_degrees)
-        sorted_degrees = sorted(counts.keys())
+    if degree_counts:
+        sorted_degrees = sorted(degree_counts.keys())
         degree_data["bins"] = [
-            {"degree": d, "frequency": counts[d]} for d in sorted_degrees
+            {"degree": d, "frequency": degree_counts[d]} for d in sorted_degrees
         ]
-        print(f"  > Processed {len(raw_degrees)} degree records.")
+        print(f"  > Processed {sum(degree_counts.values())} degree records.")
 
     # -- Clustering Section --
     clustering_data = {}
-    if raw_lcc:
-        clustering_data["local"] = {
-            "avg": statistics.mean(raw_lcc),
-            "min": min(raw_lcc),
-            "max": max(raw_lcc),
-            "p50": statistics.median(raw_lcc),
-        }
-        if len(raw_lcc) > 1:
-            clustering_data["local"]["stdev"] = statistics.stdev(raw_lcc)
+    if lcc.n:
+        clustering_data["local"] = lcc.stats()
 
-        # Simple Global estimation (Transitivity)
+        # Global clustering (transitivity): closed / all connected triples.
+        # Each triangle closes 3 triples; each open triad is one open triple.
         if (triangle_count + opentriad_count) > 0:
-            total_triplets = opentriad_count + (3 * triangle_count)
-            clustering_data["global"] = (
-                (3 * triangle_count) / total_triplets if total_triplets > 0 else 0.0
+            closed = 3 * triangle_count
+            clustering_data["global"] = closed / (closed + opentriad_count)
+
+        if clustering_estimate is not None:
+            clustering_data["global"] = clustering_estimate["global"]["value"]
+            clustering_data["estimate"] = clustering_estimate
+            ci = clustering_estimate["global"]["ci"]
+            print(
+                f"  > Transitivity ~ {clustering_data['global']:.4f} "
+                f"({clustering_estimate['confidence']:.0%} CI {ci[0]:.4f} - {ci[1]:.4f})"
             )
 
-        print(f"  > Processed {len(raw_lcc)} LCC records.")
+        print(f"  > Processed {lcc.n} LCC records.")
 
     # -- Motifs Section --
     motifs_data = {
         "triangles": triangle_count,
-        "triangles_unique_approx": int(triangle_count / 6),
         "openTriads": opentriad_count,
-        "hubs": sorted(hubs, key=lambda x: x["degree"], reverse=True),
+        "hubs": sorted(hubs, key=lambda x: (-x["degree"], x["node"])),
     }
-    print(
-        f"  > Found {triangle_count} triangle instances (approx {int(triangle_count/3)} unique)."
-    )
+    if open_triad_samples is not None:
+        motifs_data["openTriadSamples"] = open_triad_samples
+    print(f"  > Found {triangle_count} unique triangles.")
+    print(f"  > Found {opentriad_count} unique open triads.")
 
     # Final Assembly
     metrics = {
@@ -201,21 +752,22 @@ def process_gds_results(results):
         "clustering": clustering_data,
         "motifs": motifs_data,
     }
+    if dag is not None:
+        metrics["dag"] = dag
 
-    # 3. Export
-    json_path = "gds_metrics.json"
+    # 2. Export
     try:
         with open(json_path, "w") as f:
             json.dump(metrics, f, indent=2)
         print(f"\n[Success] Full GDS Metrics saved to: {os.path.abspath(json_path)}")
 
         # Print a short stdout summary for immediate feedback
-        if raw_degrees:
+        if degree_counts:
             print("\n  [Degree Distribution Preview]")
             print(f"  {'Degree':<10} | {'Frequency':<10}")
             print("  " + "-" * 25)
             # Show first 5
-            c = Counter(raw_degrees)
+            c = degree_counts
             for d in sorted(c.keys())[:5]:
                 print(f"  {d:<10} | {c[d]:<10}")
             if len(c) > 5:
@@ -224,31 +776,281 @@ def process_gds_results(results):
     except Exception as e:
         print(f"[Error] Failed to write JSON: {e}")
 
+    return metrics
+
+
+def diff_gds_metrics(expected, actual, path="", tol=1e-9):
+    """
+    Recursively compares two metrics structures.
+    Returns a list of human readable differences (floats compared with tolerance).
+    """
+    diffs = []
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual)):
+            sub = f"{path}.{key}" if path else key
+            if key not in expected:
+                diffs.append(f"{sub}: only in CSR")
+            elif key not in actual:
+                diffs.append(f"{sub}: only in MeTTa")
+            else:
+                diffs.extend(diff_gds_metrics(expected[key], actual[key], sub, tol))
+    elif isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            diffs.append(
+                f"{path}: length {len(expected)} (MeTTa) vs {len(actual)} (CSR)"
+            )
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            diffs.extend(diff_gds_metrics(e, a, f"{path}[{i}]", tol))
+    elif isinstance(expected, float) or isinstance(actual, float):
+        if abs(float(expected) - float(actual)) > tol:
+            diffs.append(f"{path}: {expected} (MeTTa) vs {actual} (CSR)")
+    elif expected != actual:
+        diffs.append(f"{path}: {expected} (MeTTa) vs {actual} (CSR)")
+    return diffs
+
+
+def sample_open_triads(graph, n, seed=0, labels=None):
+    """
+    Draws up to n uniformly sampled open triads as report entries
+    {"a", "via", "c"}, with readable labels when a symbol table is given.
+    """
+    names = graph.names
+    samples = []
+    for a, b, c in graph.sample_open_triads(n, random.Random(seed)):
+        entry = {"a": names[a], "via": names[b], "c": names[c]}
+        if labels:
+            entry["labels"] = [
+                labels.get(names[i], {}).get("label", names[i]) for i in (a, b, c)
+            ]
+        samples.append(entry)
+    return samples
+
+
+def print_open_triad_samples(samples):
+    print(f"\n  [Open Triad Samples] {len(samples)} drawn uniformly")
+    for s in samples:
+        print(f'  > (OpenTriad {s["a"]} "->" {s["via"]} "->" {s["c"]})')
+
+
+def run_csr_engine(
+    data_file_path,
+    json_path="gds_metrics.json",
+    labels=None,
+    triad_samples=0,
+    seed=0,
+    clustering="exact",
+    wedge_samples=10000,
+    lcc_samples=64,
+    hub_threshold=3,
+    top_k=0,
+    dag=None,
+):
+    """
+    Computes the galaxy_queries.metta metrics natively over a CSR adjacency.
+    Neighbor sets are built once, so triangles reduce to sorted-list intersections.
+    With `triad_samples` > 0, that many example open triads are drawn as well.
+    With clustering="sampled", LCC, triangles and open triads are wedge-sampling
+    estimates (`wedge_samples` globally, up to `lcc_samples` per node).
+    """
+    print(f"\n[CSR Engine] Target Data: {os.path.basename(data_file_path)}")
+    print("-" * 50)
+
+    t0 = time.time()
+    graph = CSRGraph.from_metta_file(data_file_path)
+    t1 = time.time()
+    print(
+        f"Build CSR:    {t1 - t0:.4f} sec "
+        f"({len(graph.nodes)} nodes, {len(graph.indices) // 2} edges)"
+    )
 
-def run_metta_script(agent, filepath, report_type="detailed"):
+    estimate = None
+    if clustering == "sampled":
+        rng = random.Random(seed)
+        metrics = estimate_gds_metrics(
+            graph, wedge_samples, lcc_samples, rng, hub_threshold, top_k
+        )
+        raw_degrees, raw_lcc, triangle_count, opentriad_count, hubs, estimate = metrics
+        print("Motifs:       triangles and open triads are sampled estimates")
+    else:
+        metrics = compute_gds_metrics(graph, hub_threshold, top_k)
+        raw_degrees, raw_lcc, triangle_count, opentriad_count, hubs = metrics
+    t2 = time.time()
+    print(f"Compute:      {t2 - t1:.4f} sec")
+
+    samples = None
+    if triad_samples > 0:
+        samples = sample_open_triads(graph, triad_samples, seed, labels)
+        print_open_triad_samples(samples)
+
+    return build_gds_report(
+        Counter(raw_degrees),
+        LCCSummary.from_values(raw_lcc),
+        triangle_count,
+        opentriad_count,
+        hubs,
+        json_path,
+        labels,
+        samples,
+        estimate,
+        dag=dag,
+    )
+
+
+def iter_directives(agent, filepath, overrides=None, trace_path=None):
+    """
+    Runs a MeTTa script one top-level `!` directive at a time and yields
+    (directive name, results) as each one finishes, so only one directive's
+    results are alive at a time. The definitions run first, as "definitions".
+    `overrides` maps a form to the one run in its place (see split_metta_script).
+    With `trace_path`, wall time, result count and RSS are recorded per directive
+    and written as a Chrome trace-event file (chrome://tracing or ui.perfetto.dev)
+    once the script is exhausted.
+    """
+    definitions, directives = split_metta_script(filepath, overrides)
+    steps = [("definitions", definitions)] + label_directives(directives)
+
+    pid = os.getpid()
+    events = [
+        {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": filepath}}
+    ]
+    rows = []
+    t_origin = time.perf_counter()
+    for name, text in steps:
+        t0 = time.perf_counter()
+        out = agent.process_metta_string(text) or []
+        t1 = time.perf_counter()
+        n = len(out)
+        yield name, out
+        del out
+        rss = rss_mb()
+        peak = max(rss, max_rss_mb())
+        rows.append((name, t1 - t0, n, rss, peak))
+        events.append(
+            {
+                "name": name,
+                "cat": "directive",
+                "ph": "X",
+                "pid": pid,
+                "tid": 1,
+                "ts": (t0 - t_origin) * 1e6,
+                "dur": (t1 - t0) * 1e6,
+                "args": {
+                    "results": n,
+                    "rss_mb": round(rss, 1),
+                    "peak_rss_mb": round(peak, 1),
+                    "source": text[:200],
+                },
+            }
+        )
+        events.append(
+            {
+                "name": "memory",
+                "ph": "C",
+                "pid": pid,
+                "ts": (t1 - t_origin) * 1e6,
+                "args": {"rss_mb": round(rss, 1)},
+            }
+        )
+
+    if not trace_path:
+        return
+
+    with open(trace_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    total = sum(row[1] for row in rows) or 1.0
+    print(f"\n[Profile] {os.path.basename(filepath)}")
+    print(
+        f"  {'Directive':<40} | {'Sec':>9} | {'%':>5} | {'Results':>8} | {'RSS MB':>8} | {'Peak MB':>8}"
+    )
+    print("  " + "-" * 93)
+    for name, sec, count, rss, peak in rows:
+        print(
+            f"  {name[:40]:<40} | {sec:>9.4f} | {100 * sec / total:>5.1f} | {count:>8} | {rss:>8.1f} | {peak:>8.1f}"
+        )
+    print(f"  Trace saved to: {os.path.abspath(trace_path)}")
+
+
+def run_metta_script(
+    agent,
+    filepath,
+    report_type="detailed",
+    json_path="gds_metrics.json",
+    labels=None,
+    profile_path=None,
+    overrides=None,
+    open_triad_samples=None,
+    clustering_estimate=None,
+    sharded=None,
+    server=None,
+    results_path=None,
+    top_k=0,
+    dag=None,
+):
     """
     Executes a specific MeTTa script file using the PeTTa agent.
     Handles output formatting based on the user's report preference (detailed vs summary).
+    Results are consumed one directive at a time (see iter_directives): printed,
+    added to a GDSAccumulator for the summary, and with `results_path` appended
+    to a JSONL file, so the full result list is never held in memory.
+    With `sharded` (run_sharded keyword arguments), worker processes run the script
+    instead of `agent`; with `server` (a query_server.py URL), the warm server runs
+    its directives.
+    Returns the GDS metrics when a summary report was built.
     """
     if not os.path.exists(filepath):
-        return
+        return None
 
     filename = os.path.basename(filepath)
     print(f"\n[Running] {filename}...")
 
     t_start = time.time()
-    results = agent.load_metta_file(filepath)
+    if server:
+        from query_server import QueryClient
+
+        _, directives = split_metta_script(filepath, overrides)
+        steps = QueryClient(server).iter_directives(directives)
+    elif sharded:
+        steps = run_sharded(filepath, overrides=overrides, **sharded)
+    else:
+        steps = iter_directives(agent, filepath, overrides, profile_path)
+
+    acc = None
+    if report_type == "summary" and "galaxy_queries" in filename:
+        acc = GDSAccumulator()
+    count = 0
+    with contextlib.ExitStack() as stack:
+        sink = None
+        if results_path:
+            sink = stack.enter_context(open(results_path, "w", encoding="utf-8"))
+        for name, out in steps:
+            count += len(out)
+            if sink:
+                sink.writelines(
+                    json.dumps({"directive": name, "result": str(r)}) + "\n"
+                    for r in out
+                )
+            if acc is not None:
+                acc.add(out)
+            else:
+                # Default behavior: Print every result line-by-line
+                for r in out:
+                    print(f"  > {r}")
     t_end = time.time()
 
-    if results:
-        if report_type == "summary" and "galaxy_queries" in filename:
-            process_gds_results(results)
-        else:
-            # Default behavior: Print every result line-by-line
-            for r in results:
-                print(f"  > {r}")
+    metrics = None
+    if count:
+        if acc is not None:
+            metrics = acc.report(
+                json_path, labels, open_triad_samples, clustering_estimate, top_k, dag
+            )
+        elif open_triad_samples:
+            print_open_triad_samples(open_triad_samples)
+    if results_path:
+        print(f"  {count} results written to: {os.path.abspath(results_path)}")
 
     print(f"  Finished in {t_end - t_start:.4f} sec")
+    return metrics
 
 
 def main():
@@ -261,13 +1063,137 @@ def main():
         "--report",
         choices=["detailed", "summary"],
         default="detailed",
-        help="Choose 'detailed' for list of all nodes, or 'summary' for grouped counts.",
+        help="'detailed' streams every node's degree and LCC; 'summary' only gets in-engine histograms and builds the report.",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["metta", "csr"],
+        default="metta",
+        help="Choose 'metta' to run galaxy_queries.metta on PeTTa/MORK, or 'csr' for the native CSR engine.",
+    )
+    parser.add_argument(
+        "--cross-check",
+        action="store_true",
+        help="With --engine csr, also run the MeTTa queries and diff both metric sets.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=int(os.environ.get("CHUNK_SIZE", "0")),
+        help="Atoms per MORK ingest chunk (0 = single call). Defaults to $CHUNK_SIZE.",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="gds_profile.trace.json",
+        default=None,
+        metavar="TRACE",
+        help="Run the queries one directive at a time and write a Chrome trace (default: gds_profile.trace.json).",
+    )
+    parser.add_argument(
+        "--precompute",
+        action="store_true",
+        help="After ingest, store (Neighbors ...) and (Degree ...) atoms that the queries read instead of re-matching edges.",
+    )
+    parser.add_argument(
+        "--triangles",
+        choices=sorted(TRIANGLE_DIRECTIVES),
+        default="list",
+        help="'list' emits each triangle once (ids a < b < c); 'count' returns per-node and global totals only.",
+    )
+    parser.add_argument(
+        "--open-triads",
+        choices=sorted(OPEN_TRIAD_DIRECTIVES),
+        default="list",
+        help="'list' emits each open triad once; 'count' returns per-node and global totals; 'sample' adds uniformly drawn examples to the counts.",
+    )
+    parser.add_argument(
+        "--triad-samples",
+        type=int,
+        default=20,
+        help="Number of example open triads drawn with --open-triads sample.",
+    )
+    parser.add_argument(
+        "--clustering",
+        choices=sorted(LCC_DIRECTIVES),
+        default="exact",
+        help="'exact' runs get-lcc per node; 'sampled' estimates LCC and transitivity by wedge sampling, with confidence intervals.",
+    )
+    parser.add_argument(
+        "--wedge-samples",
+        type=int,
+        default=10000,
+        help="Wedges drawn for the global transitivity estimate (--clustering sampled).",
+    )
+    parser.add_argument(
+        "--lcc-samples",
+        type=int,
+        default=64,
+        help="Wedges drawn per node for LCC; nodes with fewer wedges are exact (--clustering sampled).",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed for sampled modes."
+    )
+    parser.add_argument(
+        "--hub-threshold",
+        type=int,
+        default=3,
+        help="Minimum degree of a hub.",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=0,
+        help="Only report the K highest-degree hubs (ties included) instead of every node above the threshold.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Run the MeTTa queries in N processes, each with its own PeTTa/MORK space and a shard of the nodes.",
+    )
+    parser.add_argument(
+        "--results-jsonl",
+        default=None,
+        metavar="PATH",
+        help="Also stream every query result to PATH as JSON lines ({directive, result}).",
+    )
+    parser.add_argument(
+        "--server",
+        nargs="?",
+        const="http://127.0.0.1:8765",
+        default=None,
+        metavar="URL",
+        help="Send the queries to a running query_server.py (already loaded) instead of starting PeTTa.",
+    )
+    parser.add_argument(
+        "--dag",
+        action="store_true",
+        help="Also analyze every workflow's FEEDS_INTO DAG (depth, layer widths, critical path, reachability) into the report and galaxy_dag.metta.",
+    )
+    parser.add_argument(
+        "--compare-backends",
+        nargs="?",
+        const=",".join(BACKEND_NAMES),
+        default=None,
+        metavar="LIST",
+        help="Run the queries on each backend (comma-separated: hyperon, petta, mork) and compare load/query times and results.",
     )
     # Parse the arguments
     args = parser.parse_args()
-
-    print("Initializing PeTTa Environment...")
-    agent = petta.PeTTa(verbose=False)
+    if args.compare_backends:
+        backends = args.compare_backends.split(",")
+        unknown = [b for b in backends if b not in BACKEND_NAMES]
+        if unknown:
+            parser.error(f"unknown backend(s): {', '.join(unknown)}")
+    if args.workers > 1 and args.profile:
+        parser.error(
+            "--profile traces a single process; it cannot be combined with --workers"
+        )
+    if args.workers > 1 and args.server:
+        parser.error(
+            "--server queries the server's single space; it cannot be combined with --workers"
+        )
 
     # Paths
     data_file = os.path.abspath(
@@ -280,10 +1206,148 @@ def main():
         os.path.join(current_dir, "../metta/galaxy_queries.metta")
     )
 
-    # Execute Pipeline
-    benchmark_load_time(data_file)
-    run_metta_script(agent, schema_file, report_type=args.report)
-    run_metta_script(agent, queries_file, report_type=args.report)
+    # Swap directives when a non-default mode is chosen, and the edge lookups
+    # when the data file was converted with --edge-index
+    overrides = directive_overrides(
+        args.triangles,
+        args.open_triads,
+        args.clustering,
+        args.top_k,
+        args.hub_threshold,
+        per_node=args.report == "detailed",
+        edge_index=has_edge_index(data_file),
+    )
+    triad_samples = args.triad_samples if args.open_triads == "sample" else 0
+
+    if args.compare_backends:
+        from engines import compare_backends
+
+        comparison = compare_backends(
+            backends,
+            data_file,
+            schema_file,
+            queries_file,
+            overrides=overrides,
+            precompute=args.precompute,
+        )
+        if comparison["differences"]:
+            sys.exit(1)
+        return
+
+    # Symbol table written by json_to_metta.py, used to label report entries
+    labels = load_symbol_table(SYMBOLS_PATH) if os.path.exists(SYMBOLS_PATH) else None
+
+    # FEEDS_INTO DAG analytics: batched over all workflows, the same for every engine
+    dag = run_dag_analytics(data_file, DAG_PATH, labels) if args.dag else None
+
+    if args.engine == "csr":
+        csr_metrics = run_csr_engine(
+            data_file,
+            labels=labels,
+            triad_samples=triad_samples,
+            seed=args.seed,
+            clustering=args.clustering,
+            wedge_samples=args.wedge_samples,
+            lcc_samples=args.lcc_samples,
+            hub_threshold=args.hub_threshold,
+            top_k=args.top_k,
+            dag=dag,
+        )
+        if not args.cross_check:
+            return
+
+    sharded = None
+    if args.server:
+        # The server holds the loaded space; this process is only a client
+        agent = None
+    elif petta is None:
+        print(f"Error: Could not import 'petta' from {petta_path}")
+        sys.exit(1)
+    elif args.workers > 1:
+        # Every worker ingests the data into its own space; this process only merges
+        agent = None
+        sharded = {
+            "data_file": data_file,
+            "schema_file": schema_file,
+            "workers": args.workers,
+            "chunk_size": args.chunk_size,
+            "precompute": args.precompute,
+        }
+    else:
+        print("Initializing PeTTa Environment...")
+        agent = petta.PeTTa(verbose=False)
+
+        # Execute Pipeline
+        benchmark_load_time(data_file, args.chunk_size)
+        run_metta_script(agent, schema_file, report_type=args.report)
+        if args.precompute:
+            precompute_adjacency(data_file)
+        if dag is not None:
+            # (WorkflowDepth ...), (StepDepth ...) etc. for the DAG accessors
+            with open(DAG_PATH, "r", encoding="utf-8") as f:
+                mork_add_atoms(f.read())
+
+    # MeTTa has no uniform sampler over matches; samples come from the CSR adjacency
+    samples = None
+    estimate = None
+    if triad_samples or args.clustering == "sampled":
+        graph = CSRGraph.from_metta_file(data_file)
+        if triad_samples:
+            samples = sample_open_triads(graph, triad_samples, args.seed, labels)
+        if args.clustering == "sampled":
+            estimate = estimate_clustering(
+                graph, args.wedge_samples, args.lcc_samples, random.Random(args.seed)
+            )
+
+    if args.engine == "metta":
+        run_metta_script(
+            agent,
+            queries_file,
+            report_type=args.report,
+            labels=labels,
+            profile_path=args.profile,
+            overrides=overrides,
+            open_triad_samples=samples,
+            clustering_estimate=estimate,
+            sharded=sharded,
+            server=args.server,
+            results_path=args.results_jsonl,
+            top_k=args.top_k,
+            dag=dag,
+        )
+        return
+
+    # Cross-check: the MeTTa metrics go to a separate file so the CSR one is kept
+    metta_metrics = run_metta_script(
+        agent,
+        queries_file,
+        report_type="summary",
+        json_path="gds_metrics.metta.json",
+        labels=labels,
+        profile_path=args.profile,
+        overrides=overrides,
+        open_triad_samples=samples,
+        clustering_estimate=estimate,
+        sharded=sharded,
+        server=args.server,
+        results_path=args.results_jsonl,
+        top_k=args.top_k,
+        dag=dag,
+    )
+    print("\n[Cross-Check] MeTTa/MORK vs CSR")
+    print("-" * 50)
+    if metta_metrics is None:
+        print("  MeTTa run produced no results to compare.")
+        sys.exit(1)
+    diffs = diff_gds_metrics(metta_metrics, csr_metrics)
+    if not diffs:
+        print("  OK: metrics are identical.")
+    else:
+        for d in diffs[:50]:
+            print(f"  ! {d}")
+        if len(diffs) > 50:
+            print(f"  ... {len(diffs) - 50} more")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
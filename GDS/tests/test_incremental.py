@@ -0,0 +1,74 @@
+import json
+
+import json_to_metta
+import run_gds
+
+
+def step(step_id, tool_id, src=None):
+    s = {
+        "step_id": step_id,
+        "tool_id": tool_id,
+        "inputs": [{"name": "input"}],
+        "outputs": [{"name": f"out_{tool_id}"}],
+        "input_connections": {},
+    }
+    if src is not None:
+        s["input_connections"]["input"] = {"id": src}
+    return s
+
+
+def workflow(name, *tools):
+    steps = [step(0, tools[0])]
+    steps += [step(i, t, i - 1) for i, t in enumerate(tools[1:], 1)]
+    return {"workflow_name": name, "steps": steps}
+
+
+def write_dump(path, workflows):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"category": "cat", "workflow_files": workflows}], f)
+
+
+def snapshot_atoms(path):
+    return set(run_gds.read_delta_atoms(path))
+
+
+class SpaceAgent:
+    """Stands in for PeTTa: a set of atoms that remove-atom directives act on."""
+
+    def __init__(self, atoms):
+        self.space = set(atoms)
+
+    def process_metta_string(self, text):
+        for line in text.splitlines():
+            atom = line[len("!(remove-atom &mork ") : -1]
+            assert atom in self.space, atom
+            self.space.remove(atom)
+
+
+def test_delta_pair_turns_old_snapshot_into_new(tmp_path, monkeypatch):
+    dump = str(tmp_path / "dump.json")
+    out = str(tmp_path / "data.metta")
+    paths = (out, str(tmp_path / "symbols.json"), str(tmp_path / "manifest.json"))
+
+    write_dump(
+        dump,
+        [workflow("wf one", "tool_a", "tool_b"), workflow("wf two", "tool_c")],
+    )
+    json_to_metta.process_incremental(dump, *paths)
+    agent = SpaceAgent(snapshot_atoms(out))
+
+    # wf one changes a tool, wf two (the only user of tool_c) goes, wf three is new
+    write_dump(
+        dump,
+        [workflow("wf one", "tool_a", "tool_d"), workflow("wf three", "tool_b")],
+    )
+    json_to_metta.process_incremental(dump, *paths)
+    monkeypatch.setattr(
+        run_gds, "mork_add_atoms", lambda text: agent.space.update(text.split("\n"))
+    )
+
+    assert run_gds.apply_delta(agent, out)
+    assert agent.space == snapshot_atoms(out)
+    assert not any(atom.startswith(";") for atom in agent.space)
+    removed = run_gds.read_delta_atoms(json_to_metta.delta_paths(out)[1])
+    assert any(a.startswith("(NODE_ID tool_c_") for a in removed)
@@ -0,0 +1,37 @@
+import pytest
+
+import run_gds
+
+# Median 0.4 sits on a bin edge (bins are 0.05 wide), not on the 0.425 midpoint
+VALUES = [0.0, 0.1, 0.3, 0.4, 0.4, 0.4, 0.41, 0.9, 1.0]
+
+
+def folded(values):
+    """The (LCCStats ...) fold of galaxy_queries.metta, as the decoder returns it."""
+    bins = {}
+    for v in values:
+        bins[run_gds.lcc_bin(v)] = bins.get(run_gds.lcc_bin(v), 0) + 1
+    total = sum(values)
+    squares = sum(v * v for v in values)
+    return len(values), total, squares, min(values), max(values), bins.items()
+
+
+def test_per_node_values_give_the_exact_median():
+    stats = run_gds.LCCSummary.from_values(VALUES).stats()
+    assert stats["p50"] == 0.4
+    assert "p50_approx" not in stats
+
+    acc = run_gds.GDSAccumulator()
+    acc.add([f'("LCC of" n{i} ":" {v})' for i, v in enumerate(VALUES[1:])])
+    assert acc.lcc.stats()["p50"] == pytest.approx(0.4)
+
+
+def test_folded_results_report_an_approximate_median():
+    summary = run_gds.LCCSummary()
+    summary.add(0.4)
+    summary.merge(*folded(VALUES))
+    stats = summary.stats()
+    assert "p50" not in stats
+    assert stats["bin_width"] == 1 / run_gds.LCC_BINS
+    assert abs(stats["p50_approx"] - 0.4) <= stats["bin_width"]
+    assert stats["min"] == 0.0 and stats["max"] == 1.0
@@ -0,0 +1,61 @@
+import sys
+import threading
+from http.server import HTTPServer
+
+import pytest
+
+import query_server
+
+
+class FailingAgent:
+    """Stands in for PeTTa: echoes directives, raises on any that mention boom."""
+
+    def process_metta_string(self, text):
+        if "boom" in text:
+            raise RuntimeError("boom failed")
+        return [text]
+
+
+@pytest.fixture
+def server():
+    server = HTTPServer(("127.0.0.1", 0), query_server.QueryHandler)
+    server.state = {
+        "agent": FailingAgent(),
+        "data_file": "data.metta",
+        "precompute": False,
+        "started": 0.0,
+        "load_sec": 0.0,
+        "queries_served": 0,
+        "queries_failed": 0,
+    }
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def run_cli(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["query_server.py", *argv])
+    query_server.main()
+
+
+def test_failed_query_ends_stream_and_is_counted(server):
+    client = query_server.QueryClient(server)
+    lines = list(client.stream("!(boom)"))
+    assert lines[0] == {"error": "boom failed"}
+    assert lines[-1]["done"] is False
+
+    assert list(client.results("!(ok)")) == ["!(ok)"]
+    health = client.health()
+    assert (health["queries_served"], health["queries_failed"]) == (1, 1)
+
+
+def test_query_cli_exits_nonzero_on_server_error(server, monkeypatch, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        run_cli(monkeypatch, "query", "!(boom)", "--url", server)
+    assert exit_info.value.code == 1
+    assert "boom failed" in capsys.readouterr().err
+
+    run_cli(monkeypatch, "query", "!(ok)", "--url", server)
+    assert "> !(ok)" in capsys.readouterr().out
@@ -1,10 +1,49 @@
 import os
-from hyperon import MeTTa
+import sys
+import time
+import argparse
+from collections import defaultdict
+
+# Shared typed result decoder from the GDS pipeline
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(base_dir, "../../GDS/python")))
+
+from engines import make_engine
+from metta_script import split_metta_script
+from result_decoder import decode, iter_decoded, to_python
+from co_usage import load_atoms, load_or_build
+from label_propagation import propagate
+
+
+def read_members(metta):
+    """Returns {tool: community label} from the member-of atoms in the space."""
+    results = metta.run("!(community-members)")
+    return {
+        str(tool): label
+        for kind, tool, label in iter_decoded(results[0] if results else [])
+        if kind == "member"
+    }
 
 
 def main():
-    print("🔹 Initializing MeTTa Hypergraph System...")
-    metta = MeTTa()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--max-rounds", type=int, default=20, help="Label propagation round limit."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["hyperon", "petta"],
+        default="hyperon",
+        help="MeTTa engine for the rounds (GDS/python/engines.py).",
+    )
+    args = parser.parse_args()
+
+    print(f"🔹 Initializing MeTTa Hypergraph System ({args.backend})...")
+    try:
+        metta = make_engine(args.backend)
+    except ImportError as e:
+        print(f"❌ Error: {args.backend} backend unavailable: {e}")
+        return
 
     # 1. Define Paths
     base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,8 +57,7 @@ def main():
     # 2. Load UTILITIES (Directly into memory)
     print(f"🔹 Loading Logic: {utils_path}")
     try:
-        with open(utils_path, "r") as f:
-            metta.run(f.read())
+        metta.load_file(utils_path)
     except FileNotFoundError:
         print(f"❌ Error: {utils_path} not found.")
         return
@@ -27,92 +65,100 @@ def main():
     # 3. Load KNOWLEDGE BASE (Directly into memory)
     print(f"🔹 Loading Data: {kb_path} (This might take a few seconds)...")
     try:
-        with open(kb_path, "r") as f:
-            metta.run(f.read())
+        metta.load_file(kb_path)
     except FileNotFoundError:
         print(f"❌ Error: {kb_path} not found. Did you run converter.py?")
         return
 
-    # 4. Load ALGORITHM
+    # 4. Load the CO-USAGE PROJECTION (rebuilt only when the KB changed)
+    print("🔹 Loading Co-Usage Projection...")
+    t0 = time.time()
+    matrix = load_or_build(kb_path)
+    metta.add_atoms(load_atoms(kb_path))
+    print(
+        f"🔹 {len(matrix.indices) // 2} co-used pairs loaded in {time.time() - t0:.4f} sec"
+    )
+
+    # 5. Load ALGORITHM (definitions only; rounds are driven from here)
     print(f"🔹 Running Community Detection: {algo_path}")
     try:
-        with open(algo_path, "r") as f:
-            algo_lines = f.readlines()
-
-        clean_code = []
-        for line in algo_lines:
-            if "import!" not in line:
-                clean_code.append(line)
-
-        # Run the cleaned code
-        results = metta.run("".join(clean_code))
-
+        definitions, _ = split_metta_script(algo_path)
     except FileNotFoundError:
         print(f"❌ Error: {algo_path} not found.")
         return
-
-    # 5. Process Results
-    print("🔹 Processing Social Dynamics...")
-
-    influence_scores = {}
-    flat_results = []
-
-    if results:
-        for result_set in results:
-            for atom in result_set:
-                flat_results.append(atom)
-
-    print(f"🔹 Received {len(flat_results)} output atoms from MeTTa.")
-
-    for atom in flat_results:
-        atom_str = str(atom)
-
-        # Check for Errors
-        if atom_str.startswith("(Error"):
-            print(f"⚠️  MeTTa Runtime Error: {atom_str}")
-            continue
-
-        # Look for Influence tuples
-        if atom_str.startswith("(Influence"):
-            try:
-                # Format: "(Influence tool_name (neighbor1 neighbor1 ...))"
-                cleaned = atom_str.replace("(Influence ", "").strip("()")
-
-                parts = cleaned.split(" ", 1)
-                if len(parts) < 2:
-                    continue
-
-                tool_name = parts[0]
-                neighbors_blob = parts[1]
-
-                # Count Neighbors
-                neighbors_clean = neighbors_blob.replace("(", "").replace(")", "")
-                neighbor_list = neighbors_clean.split()
-                count = len(neighbor_list)
-
-                influence_scores[tool_name] = count
-
-            except Exception as e:
-                continue
+    metta.load_string(definitions)
+
+    t0 = time.time()
+    results = metta.run("!(init-communities)")
+    init_time = time.time() - t0
+    for atom in results[0] if results else []:
+        decoded = decode(atom)
+        if decoded and decoded[0] == "error":
+            print(f"⚠️  MeTTa Runtime Error: {atom}")
+            return
+    initial = read_members(metta)
+    print(f"🔹 Labelled {len(initial)} tools in {init_time:.4f} sec")
+
+    # 6. Synchronous rounds until no label changes
+    print("🔹 Running Label Propagation...")
+    print(f"  {'Round':<6} | {'Changed':>8} | {'Sec':>8}")
+    print("  " + "-" * 28)
+    history = []
+    converged = False
+    for round_no in range(1, args.max_rounds + 1):
+        t0 = time.time()
+        results = metta.run("!(lp-round)")
+        dt = time.time() - t0
+        changed = int(to_python(results[0][0]))
+        history.append(changed)
+        print(f"  {round_no:<6} | {changed:>8} | {dt:>8.4f}")
+        if changed == 0:
+            converged = True
+            break
+
+    state = "converged" if converged else "stopped at the round limit"
+    print(f"🔹 {state.capitalize()} after {len(history)} rounds.")
+    final = read_members(metta)
+
+    # 7. Verify against the Python reference (same matrix, same initial labels)
+    tools = matrix.tools
+    ref_labels, ref_rounds, _, ref_history = propagate(
+        [initial[t] for t in tools], matrix, args.max_rounds
+    )
+    mismatches = [t for t, label in zip(tools, ref_labels) if final.get(t) != label]
+    if mismatches or ref_history != history:
+        print(
+            f"⚠️  Python reference disagrees: {len(mismatches)} labels differ, "
+            f"rounds {len(history)} vs {ref_rounds}"
+        )
+        for t in mismatches[:10]:
+            print(
+                f"     {t}: MeTTa {final.get(t)} / Python {ref_labels[matrix.index[t]]}"
+            )
+    else:
+        print(f"✅ Python reference agrees ({ref_rounds} rounds, identical labels).")
 
     # --- DISPLAY RESULTS ---
+    communities = defaultdict(list)
+    for tool, label in final.items():
+        communities[label].append(tool)
+    sorted_comms = sorted(communities.items(), key=lambda x: (-len(x[1]), x[0]))
+
     print("\n" + "=" * 60)
-    print(f"{'GALAXY TOOL':<40} | {'INFLUENCE (DEGREE)':<15}")
+    print(f"{'COMMUNITY':<10} | {'SIZE':<6} | {'MEMBERS'}")
     print("=" * 60)
 
-    if not influence_scores:
-        print("❌ No Influence data found.")
+    if not communities:
+        print("❌ No community data found.")
     else:
-        sorted_tools = sorted(
-            influence_scores.items(), key=lambda x: x[1], reverse=True
-        )
-
-        for tool, score in sorted_tools[:30]:
-            display_name = tool[:38]
-            print(f"{display_name:<40} | {score:<15}")
+        for label, members in sorted_comms[:30]:
+            sample = ", ".join(sorted(members)[:4])
+            more = f" (+{len(members) - 4})" if len(members) > 4 else ""
+            print(f"{label:<10} | {len(members):<6} | {sample[:60]}{more}")
 
         print("=" * 60)
-        print(f"Total Tools Analyzed: {len(influence_scores)}")
+        print(f"Total Tools Analyzed: {len(final)}")
+        print(f"Communities Found:    {len(communities)}")
 
 
 if __name__ == "__main__":
@@ -1,10 +1,62 @@
 import os
-from hyperon import MeTTa
+import sys
+import argparse
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(base_dir, "../../GDS/python")))
+
+from engines import make_engine
+
+QUERY_1 = "!(match &self (used-in $t $w) (found-edge $t $w))"
+QUERY_2 = "!(match &self (used-in (Tool compose_text_param) $w) (found-tool-in $w))"
+
+
+def run_remote(url):
+    """
+    Runs the checks on a warm query_server.py started with
+    --load data/knowledge_base.metta, instead of loading the KB here.
+    """
+    from query_server import QueryClient
+
+    client = QueryClient(url)
+    print(f"🔹 Using query server: {url}")
+
+    print("\n--- Running Queries ---")
+    print(f"Running: {QUERY_1}")
+    result1 = list(client.results(QUERY_1))
+    print(f"Result (First 5): {result1[:5]}...")
+
+    print(f"\nChecking for compose_text_param: {QUERY_2}")
+    print(f"Result: {list(client.results(QUERY_2))}")
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--server",
+        nargs="?",
+        const="http://127.0.0.1:8765",
+        default=None,
+        metavar="URL",
+        help="Query a running GDS/python/query_server.py instead of loading the KB.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["hyperon", "petta"],
+        default="hyperon",
+        help="MeTTa engine that loads the KB (GDS/python/engines.py).",
+    )
+    args = parser.parse_args()
+    if args.server:
+        run_remote(args.server)
+        return
+
     # 1. Initialize MeTTa
-    metta = MeTTa()
+    try:
+        metta = make_engine(args.backend)
+    except ImportError as e:
+        print(f"❌ Error: {args.backend} backend unavailable: {e}")
+        return
 
     # 2. Define Paths relative
     base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,12 +66,11 @@ def main():
     data_path = os.path.join(base_dir, "../../data/knowledge_base.metta")
 
     print(f"🔹 Loading Types from: {types_path}")
-    with open(types_path, "r") as f:
-        metta.run(f.read())
+    metta.load_file(types_path)
 
     print(f"🔹 Loading Knowledge Base from: {data_path}")
     try:
-        runner = metta.run(f'!(import! &self "{data_path}")')
+        metta.load_file(data_path)
     except Exception as e:
         print(f"❌ Error loading data: {e}")
         return
@@ -27,15 +78,13 @@ def main():
     # 3. Run Checks
     print("\n--- Running Queries ---")
 
-    query_1 = "!(match &self (used-in $t $w) (found-edge $t $w))"
-    print(f"Running: {query_1}")
-    result1 = metta.run(query_1)
+    print(f"Running: {QUERY_1}")
+    result1 = metta.run(QUERY_1)
     # Print just the first few results
     print(f"Result (First 5): {result1[0][:5]}...")
 
-    query_2 = "!(match &self (used-in (Tool compose_text_param) $w) (found-tool-in $w))"
-    print(f"\nChecking for compose_text_param: {query_2}")
-    result2 = metta.run(query_2)
+    print(f"\nChecking for compose_text_param: {QUERY_2}")
+    result2 = metta.run(QUERY_2)
     print(f"Result: {result2}")
 
 
@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import hashlib
+import argparse
+from collections import defaultdict
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+KB_PATH = os.path.join(base_dir, "../../data/knowledge_base.metta")
+MATRIX_PATH = os.path.join(base_dir, "../../data/co_usage.json")
+ATOMS_PATH = os.path.join(base_dir, "../../data/co_usage.metta")
+
+USED_IN_RE = re.compile(r"^\(used-in \(Tool (\S+)\) \(Workflow (\S+)\)\)")
+
+
+def load_used_in(kb_path):
+    """Reads the (tool, workflow) pairs of every used-in atom in a knowledge base file."""
+    pairs = []
+    with open(kb_path, "r") as f:
+        for line in f:
+            m = USED_IN_RE.match(line)
+            if m:
+                pairs.append(m.groups())
+    return pairs
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class CoUsageMatrix:
+    """
+    Weighted tool-tool projection of the tool-workflow bipartite graph, stored
+    as a symmetric sparse matrix in CSR form (sorted tools, both directions).
+    weight(a, b) is the number of workflows that use both a and b.
+    """
+
+    def __init__(self, tools, indptr, indices, weights, source_sha256=None):
+        self.tools = tools
+        self.index = {t: i for i, t in enumerate(tools)}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def from_pairs(cls, pairs, source_sha256=None):
+        """Builds the projection from (tool, workflow) used-in pairs in one pass."""
+        tools = sorted({t for t, _ in pairs})
+        index = {t: i for i, t in enumerate(tools)}
+
+        by_workflow = defaultdict(list)
+        for tool, wf in pairs:
+            by_workflow[wf].append(index[tool])
+
+        rows = [defaultdict(int) for _ in tools]
+        for members in by_workflow.values():
+            for a in members:
+                row = rows[a]
+                for b in members:
+                    if a != b:
+                        row[b] += 1
+
+        indptr = [0]
+        indices = []
+        weights = []
+        for row in rows:
+            for b in sorted(row):
+                indices.append(b)
+                weights.append(row[b])
+            indptr.append(len(indices))
+        return cls(tools, indptr, indices, weights, source_sha256)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            d = json.load(f)
+        return cls(d["tools"], d["indptr"], d["indices"], d["weights"], d.get("sha256"))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "sha256": self.source_sha256,
+                    "tools": self.tools,
+                    "indptr": self.indptr,
+                    "indices": self.indices,
+                    "weights": self.weights,
+                },
+                f,
+            )
+
+    def neighbors(self, i):
+        """(tool indices, weights) of the tools co-used with tool i."""
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        return self.indices[lo:hi], self.weights[lo:hi]
+
+    def iter_pairs(self):
+        """Yields every unordered pair once as (a, b, weight) with a < b."""
+        for a in range(len(self.tools)):
+            lo, hi = self.indptr[a], self.indptr[a + 1]
+            for b, w in zip(self.indices[lo:hi], self.weights[lo:hi]):
+                if a < b:
+                    yield a, b, w
+
+    def write_atoms(self, path):
+        """Writes one (co-used a b weight) atom per unordered pair."""
+        with open(path, "w") as f:
+            f.write(";; Tool co-usage projection (generated by co_usage.py)\n")
+            for a, b, w in self.iter_pairs():
+                f.write(f"(co-used {self.tools[a]} {self.tools[b]} {w})\n")
+
+
+def load_or_build(kb_path=KB_PATH, matrix_path=MATRIX_PATH, force=False):
+    """
+    Returns the projection for kb_path, reusing the persisted matrix while the
+    knowledge base is unchanged (same sha256) and rebuilding it otherwise.
+    """
+    sha = file_sha256(kb_path)
+    if not force and os.path.exists(matrix_path):
+        matrix = CoUsageMatrix.load(matrix_path)
+        if matrix.source_sha256 == sha:
+            return matrix
+
+    matrix = CoUsageMatrix.from_pairs(load_used_in(kb_path), sha)
+    matrix.save(matrix_path)
+    return matrix
+
+
+def load_atoms(kb_path=KB_PATH, matrix_path=MATRIX_PATH, atoms_path=ATOMS_PATH):
+    """
+    Returns the text of the (co-used a b weight) atoms for kb_path, writing the
+    atoms file again whenever the projection had to be rebuilt.
+    """
+    matrix = load_or_build(kb_path, matrix_path)
+    fresh = os.path.exists(atoms_path) and os.path.getmtime(
+        atoms_path
+    ) >= os.path.getmtime(matrix_path)
+    if not fresh:
+        matrix.write_atoms(atoms_path)
+    with open(atoms_path, "r") as f:
+        return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kb", default=KB_PATH, help="Knowledge base (.metta).")
+    parser.add_argument(
+        "--output", default=MATRIX_PATH, help="Persisted sparse matrix (JSON)."
+    )
+    parser.add_argument(
+        "--atoms",
+        nargs="?",
+        const=ATOMS_PATH,
+        default=None,
+        help="Also write (co-used a b weight) atoms to this .metta file.",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Rebuild even if the KB is unchanged."
+    )
+    args = parser.parse_args()
+
+    print(f"🔹 Projecting tool co-usage from: {args.kb}")
+    matrix = load_or_build(args.kb, args.output, args.force)
+    n_pairs = len(matrix.indices) // 2
+    print(f"🔹 {len(matrix.tools)} tools, {n_pairs} co-used pairs -> {args.output}")
+
+    if args.atoms:
+        matrix.write_atoms(args.atoms)
+        print(f"🔹 Wrote {n_pairs} (co-used a b weight) atoms -> {args.atoms}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,14 @@
-import json
+import argparse
 import os
 import re
+import sys
+
+# Reuse the streaming reader from the GDS pipeline
+base_dir = os.path.dirname(os.path.abspath(__file__))
+gds_python_path = os.path.abspath(os.path.join(base_dir, "../../GDS/python"))
+sys.path.append(gds_python_path)
+
+from json_stream import iter_json_records, max_rss_mb
 
 INPUT_FILE = "../../data/raw/iwc_full.json"
 OUTPUT_FILE = "../../data/knowledge_base.metta"
@@ -42,73 +50,91 @@ def extract_tool_name(tool_id):
     return clean_symbol(tool_id)
 
 
-def convert_json_to_metta():
-    print(f"🔹 Reading {INPUT_FILE}...")
+def convert_json_to_metta(input_file=INPUT_FILE, output_file=OUTPUT_FILE):
+    print(f"🔹 Reading {input_file}...")
 
-    try:
-        with open(INPUT_FILE, "r") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        print(f"❌ Error: File not found at {INPUT_FILE}")
+    if not os.path.exists(input_file):
+        print(f"❌ Error: File not found at {input_file}")
         return
 
-    metta_output = [
-        ";; ============================================================",
-        ";; GENERATED KNOWLEDGE BASE",
-        ";; Source: iwc_full.json",
-        ";; ============================================================",
-        "",
-    ]
-    repositories = data if isinstance(data, list) else [data]
-
     total_edges = 0
     total_workflows = 0
+    total_repositories = 0
 
-    print(f"🔹 Found {len(repositories)} repositories/categories to process.")
-
-    for repo in repositories:
+    # Records are streamed and edges written immediately, nothing is accumulated
+    with open(output_file, "w") as out:
+        out.write(
+            "\n".join(
+                [
+                    ";; ============================================================",
+                    ";; GENERATED KNOWLEDGE BASE",
+                    ";; Source: iwc_full.json",
+                    ";; ============================================================",
+                    "",
+                ]
+            )
+        )
 
-        workflows = repo.get("workflow_files", [])
+        for repo in iter_json_records(input_file):
+            total_repositories += 1
 
-        for wf in workflows:
-            wf_name_raw = wf.get("workflow_name", "Unnamed")
-            wf_symbol = clean_symbol(wf_name_raw)
+            workflows = repo.get("workflow_files", [])
 
-            if wf_symbol == "Unnamed" or not wf_symbol:
-                continue
+            for wf in workflows:
+                wf_name_raw = wf.get("workflow_name", "Unnamed")
+                wf_symbol = clean_symbol(wf_name_raw)
 
-            metta_output.append(f";; Workflow: {wf_name_raw}")
-            total_workflows += 1
+                if wf_symbol == "Unnamed" or not wf_symbol:
+                    continue
 
-            steps = wf.get("steps", [])
+                out.write(f"\n;; Workflow: {wf_name_raw}")
+                total_workflows += 1
 
-            seen_tools = set()
+                steps = wf.get("steps", [])
 
-            for step in steps:
-                if step.get("type") == "tool":
-                    tool_id_raw = step.get("tool_id")
-                    tool_name = step.get("name")
+                seen_tools = set()
 
-                    canonical_id = extract_tool_name(tool_id_raw) or clean_symbol(
-                        tool_name
-                    )
+                for step in steps:
+                    if step.get("type") == "tool":
+                        tool_id_raw = step.get("tool_id")
+                        tool_name = step.get("name")
 
-                    if canonical_id and canonical_id not in seen_tools:
-                        edge = f"(used-in (Tool {canonical_id}) (Workflow {wf_symbol}))"
-                        metta_output.append(edge)
+                        canonical_id = extract_tool_name(tool_id_raw) or clean_symbol(
+                            tool_name
+                        )
 
-                        seen_tools.add(canonical_id)
-                        total_edges += 1
+                        if canonical_id and canonical_id not in seen_tools:
+                            edge = f"(used-in (Tool {canonical_id}) (Workflow {wf_symbol}))"
+                            out.write(f"\n{edge}")
 
-            metta_output.append("")
+                            seen_tools.add(canonical_id)
+                            total_edges += 1
 
-    with open(OUTPUT_FILE, "w") as f:
-        f.write("\n".join(metta_output))
+                out.write("\n")
 
+    print(f"🔹 Processed {total_repositories} repositories/categories.")
     print(f"✅ Conversion Complete.")
     print(f"🔹 Extracted {total_edges} Tool-Workflow relationships.")
-    print(f"🔹 Saved to {OUTPUT_FILE}")
+    print(f"🔹 Saved to {output_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default=INPUT_FILE, help="Raw IWC JSON dump.")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="Target .metta file.")
+    parser.add_argument(
+        "--max-rss",
+        action="store_true",
+        help="Report the peak resident memory of the conversion.",
+    )
+    args = parser.parse_args()
+
+    convert_json_to_metta(args.input, args.output)
+
+    if args.max_rss and os.path.exists(args.input):
+        size_mb = os.path.getsize(args.input) / (1024 * 1024)
+        print(f"🔹 Peak RSS: {max_rss_mb():.1f} MB (input {size_mb:.2f} MB)")
 
 
 if __name__ == "__main__":
-    convert_json_to_metta()
+    main()
@@ -1,15 +1,16 @@
 import os
 import time
 import sys
+import heapq
+import argparse
 
-# Add PeTTa to path
+# GDS/python holds the engine adapter (and puts PeTTa on the path)
 base_dir = os.path.dirname(os.path.abspath(__file__))
-petta_path = os.path.abspath(os.path.join(base_dir, "../../PeTTa/python"))
-sys.path.append(petta_path)
+sys.path.append(os.path.abspath(os.path.join(base_dir, "../../GDS/python")))
 
-# Use PeTTa instead of Hyperon
-# from hyperon import MeTTa
-from petta import PeTTa
+from engines import make_engine
+from result_decoder import iter_decoded
+from co_usage import KB_PATH, MATRIX_PATH, load_atoms
 
 # --- CONFIGURATION ---
 HUB_THRESHOLD = 80
@@ -23,30 +24,59 @@ def format_time(seconds):
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--hub-threshold",
+        type=int,
+        default=HUB_THRESHOLD,
+        help="Tools with a co-usage weight above this are hubs.",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=0,
+        help="Only treat the K heaviest tools above the threshold as hubs (0 = all).",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["petta", "hyperon"],
+        default="petta",
+        help="MeTTa engine (GDS/python/engines.py).",
+    )
+    parser.add_argument("--kb", default=KB_PATH, help="Knowledge base (.metta).")
+    parser.add_argument(
+        "--co-usage",
+        default=MATRIX_PATH,
+        help="Persisted co-usage matrix; its atoms go next to it as .metta.",
+    )
+    args = parser.parse_args()
 
     t_start = time.time()
 
-    print("🔹 Initializing MeTTa Hypergraph Engine (PeTTa)...")
-    # metta = MeTTa()
-    metta = PeTTa()
+    print(f"🔹 Initializing MeTTa Hypergraph Engine ({args.backend})...")
+    try:
+        metta = make_engine(args.backend)
+    except ImportError as e:
+        print(f"❌ Critical Error: {args.backend} backend unavailable: {e}")
+        sys.exit(1)
 
     # Path Setup
     base_dir = os.path.dirname(os.path.abspath(__file__))
     metta_dir = os.path.join(base_dir, "../metta")
-    data_dir = os.path.join(base_dir, "../../data")
 
     utils_path = os.path.join(metta_dir, "utils.metta")
-    kb_path = os.path.join(data_dir, "knowledge_base.metta")
+    kb_path = args.kb
     algo_path = os.path.join(metta_dir, "algo.metta")
 
     t_init = time.time()
 
     print("🔹 Loading Knowledge Base & Logic...")
     try:
-        with open(utils_path, "r") as f:
-            metta.process_metta_string(f.read())
-        with open(kb_path, "r") as f:
-            metta.process_metta_string(f.read())
+        metta.load_file(utils_path)
+        metta.load_file(kb_path)
+        # Precomputed (co-used a b weight) projection, rebuilt only when the KB changed
+        atoms_path = os.path.splitext(args.co_usage)[0] + ".metta"
+        metta.add_atoms(load_atoms(kb_path, args.co_usage, atoms_path))
 
         # Load algo stripping imports
         with open(algo_path, "r") as f:
@@ -54,53 +84,51 @@ def main():
 
     except FileNotFoundError as e:
         print(f"❌ Critical Error: {e}")
-        return
+        sys.exit(1)
 
     t_load = time.time()
 
     print("🔹 Executing Hypergraph Analysis (Label Propagation)...")
-    results = metta.process_metta_string("".join(algo_lines))
+    results = metta.run("".join(algo_lines))
 
-    # For compatibility, ensure flat structure handling or inspect structure
-    if results and isinstance(results[0], list):
-        flat_results = [atom for res in results for atom in res]
-    else:
-        flat_results = results
+    # One result list per directive
+    flat_results = [atom for res in results for atom in res]
 
     t_algo = time.time()
 
     print("🔹 Processing & Filtering Results...")
 
     influence_scores = {}
-    # flat_results = [atom for res in results for atom in res] # Moved up
-
-    for atom in flat_results:
-        atom_str = str(atom)
-        if atom_str.startswith("(Influence"):
-            try:
-                cleaned = atom_str.replace("(Influence ", "").strip("()")
-                parts = cleaned.split(" ", 1)
-                if len(parts) < 2:
-                    continue
-
-                tool = parts[0]
-                # Count neighbors
-                deg = len(parts[1].replace("(", "").replace(")", "").split())
-                influence_scores[tool] = deg
-            except:
-                continue
-
-    # Clustering Logic
+    membership = {}
+    rounds = None
+    converged = False
+
+    for kind, *fields in iter_decoded(flat_results):
+        if kind == "influence":
+            tool, neighbors = fields
+            # Total co-usage weight: one per (co-used tool, shared workflow)
+            influence_scores[str(tool)] = sum(int(float(w)) for _, w in neighbors)
+        elif kind == "member":
+            tool, label = fields
+            membership[str(tool)] = label
+        elif kind == "label_propagation":
+            rounds, converged = fields
+
+    # Clustering Logic: label propagation communities, hubs listed separately
     communities = {}
     hubs = []
 
     for tool, score in influence_scores.items():
-        if score > HUB_THRESHOLD:
+        if score > args.hub_threshold:
             hubs.append((tool, score))
-        else:
-            if score not in communities:
-                communities[score] = []
-            communities[score].append(tool)
+    if args.top_k > 0:
+        # Bounded heap of k entries instead of sorting every candidate
+        hubs = heapq.nlargest(args.top_k, hubs, key=lambda h: (h[1], h[0]))
+
+    hub_names = {tool for tool, _ in hubs}
+    for tool, label in membership.items():
+        if tool not in hub_names:
+            communities.setdefault(label, []).append(tool)
 
     t_process = time.time()
 
@@ -109,15 +137,19 @@ def main():
     print("🧬 GALAXY HYPERGRAPH COMMUNITY REPORT 🧬")
     print("=" * 60)
     print(f"Total Tools: {len(influence_scores)}")
-    print(f"Hubs Filtered Out (> {HUB_THRESHOLD}): {len(hubs)}")
+    top = f", top {args.top_k}" if args.top_k > 0 else ""
+    print(f"Hubs Filtered Out (> {args.hub_threshold}{top}): {len(hubs)}")
+    if rounds is not None:
+        state = "converged" if converged else "hit the round limit"
+        print(f"Label Propagation: {state} after {rounds} rounds")
 
     print("\n--- 🌐 DETECTED FUNCTIONAL MODULES ---")
 
-    sorted_comms = sorted(communities.items(), key=lambda x: x[0], reverse=True)
+    sorted_comms = sorted(communities.items(), key=lambda x: (-len(x[1]), x[0]))
 
-    for score, tools in sorted_comms:
+    for label, tools in sorted_comms:
         if len(tools) >= 2:
-            print(f"\n[🔗 Connectivity Score: {score}]")
+            print(f"\n[🔗 Community {label}: {len(tools)} tools]")
             print(f"  Members: {', '.join(tools)}")
             prefixes = [t.split("_")[0] for t in tools]
             common_tag = max(set(prefixes), key=prefixes.count)
@@ -125,7 +157,7 @@ def main():
 
     # --- BENCHMARK SUMMARY ---
     print("\n" + "=" * 60)
-    print("🚀 PERFORMANCE BENCHMARK (PeTTa)")
+    print(f"🚀 PERFORMANCE BENCHMARK ({args.backend})")
     print("=" * 60)
 
     time_init = t_init - t_start
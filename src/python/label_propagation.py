@@ -0,0 +1,56 @@
+from array import array
+from collections import defaultdict
+
+
+def propagation_round(labels, matrix, nodes=None):
+    """
+    One synchronous round over the co-usage matrix (see co_usage.py). Returns
+    the new label array: the neighbor label with the largest total co-usage
+    weight, ties keeping the current label if it is among the best and
+    otherwise taking the smallest. Only `nodes` are recomputed (all if None);
+    the rest keep their label.
+    """
+    new = array("l", labels)
+    indptr, indices, weights = matrix.indptr, matrix.indices, matrix.weights
+    for node in range(len(labels)) if nodes is None else nodes:
+        lo, hi = indptr[node], indptr[node + 1]
+        if lo == hi:
+            continue
+        votes = defaultdict(int)
+        for k in range(lo, hi):
+            votes[labels[indices[k]]] += weights[k]
+
+        best_n = max(votes.values())
+        best = [label for label, n in votes.items() if n == best_n]
+        new[node] = labels[node] if labels[node] in best else min(best)
+    return new
+
+
+def propagate(labels, matrix, max_rounds=20):
+    """
+    Runs rounds until no label changes (that round included) or max_rounds.
+    labels are indexed like matrix.tools.
+    A node's vote depends only on its own and its neighbors' labels, so after
+    the first round only the changed nodes and their neighbors are recomputed.
+    Returns (labels, rounds, converged, changes per round).
+    """
+    labels = array("l", labels)
+    indptr, indices = matrix.indptr, matrix.indices
+    history = []
+    active = None
+    for _ in range(max_rounds):
+        new = propagation_round(labels, matrix, active)
+        changed = [
+            i
+            for i in (range(len(labels)) if active is None else active)
+            if labels[i] != new[i]
+        ]
+        history.append(len(changed))
+        labels = new
+        if not changed:
+            return labels, len(history), True, history
+        active = set(changed)
+        for i in changed:
+            active.update(indices[indptr[i] : indptr[i + 1]])
+        active = sorted(active)
+    return labels, len(history), False, history